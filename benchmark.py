@@ -0,0 +1,267 @@
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SURNAMES = ['Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов']
+MALE_NAMES = ['Алексей', 'Дмитрий', 'Иван', 'Сергей', 'Андрей', 'Михаил', 'Павел', 'Никита']
+FEMALE_NAMES = ['Мария', 'Анна', 'Елена', 'Ольга', 'Светлана', 'Полина', 'Ксения', 'Дарья']
+CITIES = ['Москва', 'Санкт-Петербург', 'Самара', 'Казань', 'Новосибирск', 'Екатеринбург']
+DATE_SEPARATORS = ['.', '-', '/', ' ']
+
+# Прежняя реализация pyth.py (readlines + re.match на каждую строку) для сравнения
+LEGACY_SNIPPET = """
+import re, sys
+from collections import Counter
+with open(sys.argv[1], 'r', encoding='utf-8') as file:
+    lines = file.readlines()
+names = []
+for line in lines:
+    line = line.strip()
+    match = re.match(r'^Имя:\\s*([^:\\n]+)$', line)
+    if match:
+        name = match.group(1).strip()
+        if name:
+            names.append(name)
+counter = Counter(names)
+"""
+STREAMING_SNIPPET = """
+import sys
+import pyth
+counter = pyth.count_names(sys.argv[1])
+"""
+APPROX_SNIPPET = """
+import sys
+import pyth
+counter = pyth.count_names(sys.argv[1], capacity={capacity})
+"""
+INCREMENTAL_SNIPPET = """
+import sys
+import pyth
+counter, _ = pyth.count_incremental(sys.argv[1])
+"""
+PARALLEL_SNIPPET = """
+import sys
+import pyth
+counter = pyth.count_names_parallel([sys.argv[1]], {workers})
+"""
+# Замер делается внутри отдельного процесса, чтобы пиковая память относилась только к нему
+MEASURE_SNIPPET = """
+import resource, sys, time
+start = time.perf_counter()
+exec(sys.argv[2])
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+      sum(counter.values()) if isinstance(counter, dict) else counter.total)
+"""
+
+
+def get_args() -> argparse.Namespace:
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(description='Замеры загрузки изображений и подсчета имен')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    download = subparsers.add_parser('download', help='Скорость загрузки изображений')
+    download.add_argument('-n', '--count', type=int, default=200, help='Количество изображений')
+    download.add_argument('--size', type=int, default=200 * 1024, help='Размер изображения, байт')
+    download.add_argument('--latency', type=float, default=0.05,
+                          help='Задержка ответа тестового сервера, с')
+    download.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16],
+                          help='Количество потоков для сравнения')
+    download.add_argument('--fail-every', type=int, default=0,
+                          help='Каждый N-й первый запрос отвечает 503 (проверка повторов)')
+
+    names = subparsers.add_parser('names', help='Подсчет имен в файле формата data.txt')
+    names.add_argument('--size-mb', type=int, default=2048, help='Размер сгенерированного файла, МБ')
+    names.add_argument('--file', type=str, default=None,
+                       help='Путь к файлу (создается, если его нет; по умолчанию - временный)')
+    names.add_argument('--legacy', action='store_true',
+                       help='Замерить и прежнюю реализацию (читает весь файл в память)')
+    names.add_argument('--workers', type=int, nargs='+', default=[],
+                       help='Количество процессов для замера параллельного режима')
+    names.add_argument('--approx', type=int, nargs='+', default=[],
+                       help='Размеры сводки для замера приближенного режима')
+    names.add_argument('--append-mb', type=int, default=0,
+                       help='Замерить инкрементальный пересчет после дописывания стольких МБ')
+    return parser.parse_args()
+
+
+def make_handler(size: int, latency: float, fail_every: int):
+    """Обработчик тестового сервера: отдает size байт на любой путь .jpg.
+
+    Содержимое у каждого пути свое, иначе все файлы кроме первого
+    оказались бы повторами и замер показывал бы скорость дедупликации.
+    """
+    payload = os.urandom(size)
+    failed = set()
+    lock = threading.Lock()
+
+    class ImageHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, как у настоящих серверов
+
+        def do_GET(self):
+            time.sleep(latency)
+            number = int(''.join(ch for ch in self.path if ch.isdigit()) or 0)
+            with lock:
+                fail = fail_every and number % fail_every == 0 and number not in failed
+                if fail:
+                    failed.add(number)
+            if fail:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            # Начало заменяем хэшем пути, остальное - общие случайные байты
+            body = (hashlib.sha256(self.path.encode()).digest() + payload[32:])[:size]
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Не засоряем вывод замеров
+
+    return ImageHandler
+
+
+def report_download(count: int, size: int, latency: float, workers: list, fail_every: int) -> None:
+    """Пропускная способность загрузки с локального сервера при разном числе потоков."""
+    from image_downloader import download_images  # Нужен requests, для замера имен не требуется
+
+    results = []
+    for worker_count in workers:
+        # Свой сервер на каждый замер, чтобы отказы 503 повторялись одинаково
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(size, latency, fail_every))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        urls = [f"http://{host}:{port}/img/{i}.jpg" for i in range(1, count + 1)]
+
+        save_dir = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            done = download_images('bench', '-', '-', count, save_dir, urls=urls,
+                                   workers=worker_count, per_host=worker_count)
+            elapsed = time.perf_counter() - start
+
+            # Повторный запуск по той же папке: только чтение журнала
+            start = time.perf_counter()
+            download_images('bench', '-', '-', count, save_dir, urls=urls,
+                            workers=worker_count, per_host=worker_count)
+            rerun = time.perf_counter() - start
+        finally:
+            shutil.rmtree(save_dir)
+            server.shutdown()
+            server.server_close()
+        results.append((worker_count, done, elapsed, rerun))
+
+    print(f"\n{count} изображений по {size // 1024} КБ, задержка сервера {latency * 1000:.0f} мс")
+    base = results[0][2]
+    for worker_count, done, elapsed, rerun in results:
+        print(f"  потоков {worker_count:3d}: {elapsed:6.2f} с, {done / elapsed:7.1f} файл/с, "
+              f"{done * size / elapsed / 2 ** 20:6.1f} МБ/с, x{base / elapsed:.1f}, "
+              f"повторный запуск {rerun * 1000:.0f} мс")
+
+
+def make_record(number: int, rng: random.Random) -> str:
+    """Запись реестра в формате data.txt."""
+    male = rng.random() < 0.5
+    name = rng.choice(MALE_NAMES if male else FEMALE_NAMES)
+    surname = rng.choice(SURNAMES) + ('' if male else 'а')
+    gender = rng.choice(['Мужской', 'М', 'м'] if male else ['Женский', 'Ж', 'ж'])
+    separator = rng.choice(DATE_SEPARATORS)
+    birth = separator.join([f"{rng.randint(1, 28):02d}", f"{rng.randint(1, 12):02d}",
+                            str(rng.randint(1950, 2012))])
+    contact = f"+7 9{rng.randint(10, 99)} {rng.randint(100, 999)} {rng.randint(10, 99)} {rng.randint(10, 99)}"
+    return (f"{number})\nФамилия: {surname}\nИмя: {name}\nПол: {gender}\n"
+            f"Дата рождения: {birth}\nНомер телефона или email: {contact}\n"
+            f"Город: {rng.choice(CITIES)}\n\n")
+
+
+def generate_registry(path: str, size_mb: int, seed: int = 0, append: bool = False) -> None:
+    """Создает (или дописывает) файл формата data.txt размером около size_mb мегабайт."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    number = 1
+    with open(path, 'a' if append else 'w', encoding='utf-8') as file:
+        while written < target:
+            batch = ''.join(make_record(number + i, rng) for i in range(10000))
+            number += 10000
+            file.write(batch)
+            written += len(batch.encode('utf-8'))
+
+
+def measure_process(snippet: str, path: str) -> tuple:
+    """(время, пиковая память в МБ, количество имен) для кода snippet в новом процессе."""
+    folder = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', MEASURE_SNIPPET, path, snippet],
+                            cwd=folder, capture_output=True, text=True, check=True)
+    elapsed, max_rss, total = result.stdout.split()
+    return float(elapsed), int(max_rss) / 1024, int(total)
+
+
+def report_names(size_mb: int, path: str, legacy: bool, workers: list, approx: list,
+                 append_mb: int) -> None:
+    """Скорость и память потокового подсчета имен (и прежнего, если legacy)."""
+    temp_dir = None
+    if path is None:
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, 'data.txt')
+    try:
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            generate_registry(path, size_mb)
+            print(f"Сгенерирован {path} за {time.perf_counter() - start:.1f} с")
+        file_mb = os.path.getsize(path) / 2 ** 20
+
+        methods = [('потоковый', STREAMING_SNIPPET)]
+        if legacy:
+            methods.append(('прежний', LEGACY_SNIPPET))
+        for worker_count in workers:
+            methods.append((f"{worker_count} проц.", PARALLEL_SNIPPET.format(workers=worker_count)))
+        for capacity in approx:
+            methods.append((f"сводка {capacity}", APPROX_SNIPPET.format(capacity=capacity)))
+        print(f"\nФайл {file_mb:.0f} МБ")
+        for title, snippet in methods:
+            elapsed, max_rss, total = measure_process(snippet, path)
+            # Для параллельного режима память указана только главного процесса
+            print(f"  {title:10s}: {elapsed:7.2f} с, {file_mb / elapsed:6.0f} МБ/с, "
+                  f"пик памяти {max_rss:7.0f} МБ, имен {total}")
+
+        if append_mb:
+            # Первый запуск сохраняет состояние, второй разбирает только дописанное
+            state = path + '.names-state.json'
+            if os.path.exists(state):
+                os.remove(state)
+            first, _, _ = measure_process(INCREMENTAL_SNIPPET, path)
+            generate_registry(path, append_mb, seed=1, append=True)
+            second, _, total = measure_process(INCREMENTAL_SNIPPET, path)
+            print(f"  инкрементальный: первый запуск {first:.2f} с, "
+                  f"после дописывания {append_mb} МБ {second:.2f} с, имен {total}")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+def main() -> None:
+    """Основная функция."""
+    args = get_args()
+    if args.mode == 'download':
+        report_download(args.count, args.size, args.latency, args.workers, args.fail_every)
+    else:
+        report_names(args.size_mb, args.file, args.legacy, args.workers, args.approx,
+                     args.append_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,209 @@
+import hashlib
+import json
 import os
-import requests
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 64 * 1024  # Размер блока при потоковой записи на диск
+RETRY_STATUSES = {429, 500, 502, 503, 504}  # Ответы сервера, после которых есть смысл повторить
+MANIFEST_NAME = 'manifest.jsonl'  # Журнал загрузок в папке с изображениями
+
+thread_data = threading.local()  # У каждого потока своя сессия с пулом соединений
+
+
+def read_url_list(path: str) -> list:
+    """Читает список URL из файла: по одному на строку, '#' - комментарий."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+def get_session(pool_size: int) -> requests.Session:
+    """Сессия текущего потока: соединения с хостами переиспользуются (keep-alive).
+
+    pool_size - сколько соединений с одним хостом держать открытыми (pool_maxsize);
+    число хостов, для которых хранятся пулы (pool_connections), остается по умолчанию.
+    """
+    session = getattr(thread_data, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        thread_data.session = session
+    return session
+
+
+class Manifest:
+    """Журнал загрузок: по строке JSON на файл (url, file, size, sha256, status).
+
+    Записи только дописываются, при чтении действует последняя запись о файле,
+    так что прерванный запуск оставляет журнал корректным. По sha256 находятся
+    одинаковые по содержимому изображения.
+    """
+
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, MANIFEST_NAME)
+        self.records = {}  # file -> последняя запись
+        self.hashes = {}  # sha256 -> файл, в котором это содержимое хранится
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Недописанная строка после аварийной остановки
+                    self.records[record['file']] = record
+
+        for record in self.records.values():
+            if record['status'] == 'done':
+                self.hashes.setdefault(record['sha256'], record['file'])
+
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def is_done(self, filename: str, url: str = None) -> bool:
+        """Файл уже скачан с этого url и не изменился (проверяется только размер)."""
+        record = self.records.get(filename)
+        if record is None or record['url'] != url:
+            return False
+        if record['status'] == 'duplicate':
+            return True  # Дубликат намеренно не сохранялся
+        if record['status'] not in ('done', 'linked'):
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.save_dir, filename)) == record['size']
+        except OSError:
+            return False
+
+    def add(self, url: str, filename: str, size: int, sha256: str, status: str, **extra) -> None:
+        """Дописать запись о файле."""
+        record = {'url': url, 'file': filename, 'size': size,
+                  'sha256': sha256, 'status': status, **extra}
+        self.records[filename] = record
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def deduplicate(self, filename: str, sha256: str) -> tuple:
+        """Заменяет повтор уже сохраненного содержимого жесткой ссылкой на оригинал.
+
+        Если ссылки не поддерживаются, повтор удаляется. Возвращает (статус, оригинал).
+        """
+        original = self.hashes.get(sha256)
+        filepath = os.path.join(self.save_dir, filename)
+        original_path = os.path.join(self.save_dir, original) if original else None
+        if original is None or original == filename or not os.path.exists(original_path):
+            self.hashes[sha256] = filename
+            return 'done', None
+
+        link_path = filepath + '.link'
+        try:
+            os.link(original_path, link_path)
+            os.replace(link_path, filepath)
+            return 'linked', original
+        except OSError:
+            if os.path.exists(link_path):
+                os.remove(link_path)
+            os.remove(filepath)
+            return 'duplicate', original
+
+    def close(self) -> None:
+        """Закрыть журнал."""
+        self.file.close()
+
+
+class HostLimiter:
+    """Ограничение числа одновременных запросов к одному хосту."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> threading.BoundedSemaphore:
+        """Семафор хоста, к которому относится url."""
+        host = urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+
+def fetch(
+    url: str,
+    filepath: str,
+    limiter: HostLimiter,
+    retries: int = 3,
+    backoff: float = 0.5,
+    timeout: float = 30.0
+) -> tuple:
+    """Скачивает url в filepath и возвращает (размер в байтах, sha256).
+
+    Данные пишутся потоком во временный .part файл, который переименовывается
+    только после полной загрузки, поэтому оборванный файл не примется за готовый.
+    При сетевых ошибках и ответах 429/5xx запрос повторяется с экспоненциальной паузой.
+    """
+    part_path = filepath + '.part'
+    session = get_session(limiter.per_host)
+
+    for attempt in range(retries + 1):
+        try:
+            with limiter.get(url):
+                with session.get(url, stream=True, timeout=timeout) as response:
+                    if response.status_code in RETRY_STATUSES and attempt < retries:
+                        raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                    response.raise_for_status()
+
+                    size = 0
+                    digest = hashlib.sha256()
+                    with open(part_path, 'wb') as f:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+            os.replace(part_path, filepath)
+            return size, digest.hexdigest()
+
+        except requests.RequestException as e:
+            status = e.response.status_code if e.response is not None else None
+            if attempt == retries or (status is not None and status not in RETRY_STATUSES):
+                raise
+            # Пауза растет вдвое с каждой попыткой, случайная добавка разводит потоки
+            time.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+def create_placeholders(keyword: str, max_num: int, manifest: Manifest) -> int:
+    """Создает тестовые файлы изображений (если список URL не задан)."""
+    created = 0
+    for i in range(max_num):
+        filename = f"{keyword}_{i + 1:03d}.jpg"
+        if manifest.is_done(filename):
+            continue
+
+        data = f"Тестовое изображение {keyword} #{i + 1}".encode('utf-8')
+        with open(os.path.join(manifest.save_dir, filename), 'wb') as f:
+            f.write(data)
+        manifest.add(None, filename, len(data), hashlib.sha256(data).hexdigest(), 'done')
+        created += 1
+
+        if created % 10 == 0:
+            print(f"Создано {created} файлов")
+
+    return created
 
 
 def download_images(
@@ -8,23 +211,90 @@ def download_images(
     date_from: str,
     date_to: str,
     max_num: int,
-    save_dir: str
-) -> None:
-    """Создает тестовые файлы изображений."""
+    save_dir: str,
+    urls: list = None,
+    workers: int = 8,
+    per_host: int = 4,
+    retries: int = 3
+) -> int:
+    """Скачивает изображения по списку URL и возвращает число новых файлов.
+
+    Загрузка идет в ограниченном пуле потоков, не более per_host запросов
+    к одному хосту одновременно. Без списка URL создает тестовые файлы.
+    Файлы, уже отмеченные в журнале manifest.jsonl, пропускаются, повторы
+    содержимого заменяются жесткими ссылками.
+    """
     os.makedirs(save_dir, exist_ok=True)
 
     print(f"Создание изображений '{keyword}'")
     print(f"Период: {date_from} - {date_to}")
     print(f"Целевое количество: {max_num} файлов")
 
-    for i in range(max_num):
-        filename = f"{keyword}_{i + 1:03d}.jpg"
-        filepath = os.path.join(save_dir, filename)
+    manifest = Manifest(save_dir)
+    try:
+        if not urls:
+            created = create_placeholders(keyword, max_num, manifest)
+            print(f"Готово! Создано {created} новых файлов в папке '{save_dir}'")
+            return created
+        return fetch_all(keyword, urls[:max_num], manifest, workers, per_host, retries)
+    finally:
+        manifest.close()
+
+
+def fetch_all(
+    keyword: str,
+    urls: list,
+    manifest: Manifest,
+    workers: int,
+    per_host: int,
+    retries: int
+) -> int:
+    """Скачивает еще не скачанные url, ведя журнал. Возвращает число новых файлов."""
+    limiter = HostLimiter(per_host)
+    done = 0
+    failed = 0
+    linked = 0
+    total_bytes = 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for i, url in enumerate(urls):
+            suffix = Path(urlsplit(url).path).suffix.lower() or '.jpg'
+            filename = f"{keyword}_{i + 1:03d}{suffix}"
+            if manifest.is_done(filename, url):
+                continue
+            filepath = os.path.join(manifest.save_dir, filename)
+            futures[executor.submit(fetch, url, filepath, limiter, retries)] = (url, filename)
+
+        skipped = len(urls) - len(futures)
+        if skipped:
+            print(f"Уже скачано ранее: {skipped} файлов")
 
-        with open(filepath, 'w') as f:
-            f.write(f"Тестовое изображение {keyword} #{i + 1}")
+        # Результаты обрабатываются только в этом потоке, журналу блокировки не нужны
+        for future in as_completed(futures):
+            url, filename = futures[future]
+            try:
+                size, sha256 = future.result()
+            except (requests.RequestException, OSError) as e:
+                failed += 1
+                manifest.add(url, filename, 0, None, 'failed', error=str(e))
+                print(f"Не удалось скачать {url}: {e}")
+            else:
+                status, original = manifest.deduplicate(filename, sha256)
+                if original:
+                    manifest.add(url, filename, size, sha256, status, same_as=original)
+                    linked += 1
+                else:
+                    manifest.add(url, filename, size, sha256, status)
+                done += 1
+                total_bytes += size
 
-        if (i + 1) % 10 == 0:
-            print(f"Создано {i + 1}/{max_num} файлов")
+            if (done + failed) % 10 == 0:
+                print(f"Обработано {done + failed}/{len(futures)} файлов")
 
-    print(f"Готово! Создано {max_num} файлов в папке '{save_dir}'")
+    elapsed = time.perf_counter() - start
+    print(f"Готово! Скачано {done} файлов ({total_bytes / 2 ** 20:.1f} МБ) "
+          f"за {elapsed:.1f} с в папку '{manifest.save_dir}', "
+          f"повторов содержимого: {linked}, ошибок: {failed}")
+    return done
@@ -1,16 +1,89 @@
+from bisect import bisect_left, bisect_right
+import csv
 import os
-import pandas as pd
+import threading
+
+from path_store import PathStore
+
+SUPPORTED_FORMATS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+PATH_COLUMNS = ('path', 'file', 'image', 'filename', 'abs_path')  # Возможные столбцы с путями
+LABEL_COLUMNS = ('label', 'class')  # Возможные столбцы с метками
+PYARROW_MIN_BYTES = 32 * 1024 * 1024  # С какого размера CSV читать через pyarrow (если есть)
+SCAN_BATCH = 256  # Сколько найденных изображений сортировать и публиковать за раз
+
+
+def pick_columns(header: list):
+    """Столбец с путями и столбец с метками (или None) по заголовку CSV"""
+    if not header:
+        raise ValueError("CSV файл пуст")
+
+    path_column = next((col for col in PATH_COLUMNS if col in header), header[0])
+    label_column = next((col for col in LABEL_COLUMNS if col in header), None)
+    return path_column, label_column
+
+
+def read_csv_header(csv_path: str) -> list:
+    """Прочитать только строку заголовка"""
+    with open(csv_path, newline='', encoding='utf-8-sig') as file:
+        return next(csv.reader(file), [])
+
+
+def iter_csv_stdlib(csv_path: str, path_column: str, label_column):
+    """Потоковое чтение нужных столбцов модулем csv, по одной строке"""
+    with open(csv_path, newline='', encoding='utf-8-sig') as file:
+        reader = csv.reader(file)
+        header = next(reader, [])
+        path_index = header.index(path_column)
+        label_index = header.index(label_column) if label_column else None
+
+        for row in reader:
+            if len(row) <= path_index or not row[path_index]:
+                continue  # Пустые и обрезанные строки пропускаем
+            label = row[label_index] if label_index is not None and label_index < len(row) else ""
+            yield row[path_index], label
+
+
+def iter_csv_pyarrow(csv_path: str, path_column: str, label_column):
+    """Чтение только нужных столбцов многопоточным CSV движком pyarrow"""
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    columns = [path_column] + ([label_column] if label_column else [])
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={col: pa.string() for col in columns},
+        ),
+    )
+    paths = table.column(path_column).to_pylist()
+    labels = table.column(label_column).to_pylist() if label_column else [None] * len(paths)
+    for path, label in zip(paths, labels):
+        if path:
+            yield path, label or ""
+
+
+def has_pyarrow() -> bool:
+    """Установлен ли pyarrow (без его импорта)"""
+    import importlib.util
+    return importlib.util.find_spec("pyarrow") is not None
 
 
 class ImageIterator:
     """Универсальный итератор для изображений и CSV аннотаций"""
 
-    def __init__(self, source: str):
-        """Конструктор принимает путь к папке или CSV файлу"""
-        self.paths = []
-        self.counter = 0
-        self.labels = []  # Для хранения меток из CSV
+    def __init__(self, source: str, recursive: bool = False):
+        """Конструктор принимает путь к папке или CSV файлу.
+        recursive - искать изображения и во вложенных папках.
+        """
+        self.items = PathStore()  # Пути и метки (метки есть только в CSV)
+        self.current = -1  # Индекс текущего изображения, -1 - еще ничего не показано
         self.source_type = None
+        self.filter_label = None  # Показываются только изображения с этой меткой (None - все)
+        self.filter_positions = None  # Позиции изображений с меткой filter_label
+        self.loading = False  # Папка еще перечисляется в фоне
+        self.stop_loading = False
+        self.first_found = threading.Event()
 
         if not source:
             raise RuntimeError("Пустой путь к источнику")
@@ -21,100 +94,239 @@ class ImageIterator:
             self.load_from_csv(source)
         elif os.path.isdir(source):
             self.source_type = 'folder'
-            self.load_from_folder(source)
+            self.load_from_folder(source, recursive)
         else:
             raise RuntimeError(f"Неподдерживаемый источник: {source}")
 
-        if not self.paths:
+        if not len(self.items):
             raise RuntimeError("Не найдено ни одного изображения")
 
     def load_from_csv(self, csv_path: str):
-        """Загрузка путей из CSV файла"""
+        """Загрузка путей из CSV файла.
+        Читаются только столбец с путями и столбец с метками: небольшие файлы
+        потоково модулем csv, большие - через pyarrow, если он установлен.
+        """
         try:
-            df = pd.read_csv(csv_path)
-
-            # Ищем столбцы с путями к изображениям
-            possible_columns = ['path', 'file', 'image', 'filename', 'abs_path']
-            path_column = None
-
-            for col in possible_columns:
-                if col in df.columns:
-                    path_column = col
-                    break
-
-            if path_column is None:
-                # Если не нашли стандартные названия, берем первый столбец
-                path_column = df.columns[0]
-
-            # Берем столбец с метками если есть
-            if 'label' in df.columns:
-                self.labels = df['label'].tolist()
-            elif 'class' in df.columns:
-                self.labels = df['class'].tolist()
+            path_column, label_column = pick_columns(read_csv_header(csv_path))
+
+            if os.path.getsize(csv_path) >= PYARROW_MIN_BYTES and has_pyarrow():
+                rows = iter_csv_pyarrow(csv_path, path_column, label_column)
             else:
-                self.labels = [""] * len(df)
+                rows = iter_csv_stdlib(csv_path, path_column, label_column)
 
-            self.paths = df[path_column].tolist()
-            print(f"Загружено {len(self.paths)} изображений из CSV")
+            for path, label in rows:
+                self.items.append(path, label)
+            print(f"Загружено {len(self.items)} изображений из CSV")
 
         except Exception as e:
             raise RuntimeError(f"Ошибка чтения CSV: {e}")
 
-    def load_from_folder(self, folder_path: str):
-        """Загрузка путей из папки"""
-        supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+    def load_from_folder(self, folder_path: str, recursive: bool = False):
+        """Загрузка путей из папки.
+        Папка перечисляется через os.scandir в фоновом потоке, изображения
+        доступны по мере нахождения пачками по SCAN_BATCH (внутри пачки -
+        по имени, пачки - в порядке файловой системы).
+        Возвращает управление, как только опубликована первая пачка.
+        """
+        self.loading = True
+        loader = threading.Thread(target=self.scan_folder,
+                                  args=(folder_path, recursive), daemon=True)
+        loader.start()
+        self.first_found.wait()
+
+    def scan_folder(self, folder_path: str, recursive: bool):
+        """Перечисление папки (выполняется в фоновом потоке)"""
+        directories = [folder_path]
+        try:
+            while directories and not self.stop_loading:
+                directory = directories.pop()
+                images, subdirectories = [], []
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            if self.stop_loading:
+                                break
+                            if entry.name.lower().endswith(SUPPORTED_FORMATS) and entry.is_file():
+                                images.append(entry.path)
+                                if len(images) >= SCAN_BATCH:
+                                    self.publish(images)
+                                    images = []
+                            elif recursive and entry.is_dir(follow_symlinks=False):
+                                subdirectories.append(entry.path)
+                except OSError:
+                    continue  # Нет доступа к папке - пропускаем
+                self.publish(images)
+                directories.extend(sorted(subdirectories, reverse=True))
+        finally:
+            self.loading = False
+            self.first_found.set()
 
-        for file_name in os.listdir(folder_path):
-            if file_name.lower().endswith(supported_formats):
-                full_path = os.path.join(folder_path, file_name)
-                self.paths.append(full_path)
-                self.labels.append("")  # Пустая метка для папок
+        print(f"Загружено {len(self.items)} изображений из папки")
+
+    def publish(self, images: list):
+        """Добавить пачку найденных изображений.
+        Порядок scandir зависит от файловой системы, поэтому пачка сортируется;
+        всю папку не ждем, чтобы большая папка не задерживала первое изображение.
+        """
+        for path in sorted(images):
+            self.items.append(path)  # Пустая метка для папок
+        if images:
+            self.first_found.set()
+
+    def close(self):
+        """Остановить фоновую загрузку"""
+        self.stop_loading = True
+
+    def set_filter(self, label=None):
+        """Показывать только изображения с меткой label (None - все).
+        Индекс по меткам строится при загрузке, поэтому переключение - O(1).
+        Текущее изображение не меняется: следующим будет ближайшее после него с этой меткой.
+        """
+        if label is None:
+            self.filter_label = None
+            self.filter_positions = None
+            return
+
+        try:
+            self.filter_positions = self.items.label_positions(label)
+        except KeyError:
+            raise ValueError(f"Нет изображений с меткой '{label}'")
+        self.filter_label = label
 
-        self.paths.sort()  # Сортируем для порядка
-        print(f"Загружено {len(self.paths)} изображений из папки")
+    def label_counts(self) -> dict:
+        """Количество изображений каждой метки"""
+        return self.items.label_counts()
+
+    def index(self, row: int) -> int:
+        """Позиция в датасете для номера row с учетом фильтра"""
+        if self.filter_positions is None:
+            return row
+        return self.filter_positions[row]
+
+    def __len__(self):
+        """Количество изображений с учетом фильтра"""
+        if self.filter_positions is None:
+            return len(self.items)
+        return len(self.filter_positions)
+
+    def __getitem__(self, index):
+        """(путь, метка) по номеру с учетом фильтра или список пар по срезу"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self.filter_positions is None:
+            return self.items[index]
+        return self.items[self.filter_positions[index]]
+
+    def path(self, row: int) -> str:
+        """Путь по номеру с учетом фильтра"""
+        return self.items.path(self.index(row))
 
     def __iter__(self):
-        self.counter = 0
+        self.current = -1
         return self
 
     def __next__(self):
         """Получить следующее изображение"""
-        if not self.paths:
-            raise StopIteration("Нет изображений")
-
-        if self.counter >= len(self.paths):
-            self.counter = 0  # Циклический переход
-
-        path = self.paths[self.counter]
-        label = self.labels[self.counter] if self.counter < len(self.labels) else ""
-        self.counter += 1
-
-        return path, label
+        positions = self.filter_positions
+        if positions is None:
+            total = len(self.items)
+            if not total:
+                raise StopIteration("Нет изображений")
+            self.current = (self.current + 1) % total  # Циклический переход
+        else:
+            if not positions:
+                raise StopIteration("Нет изображений")
+            # Первая позиция с меткой после текущей, по кругу
+            self.current = positions[bisect_right(positions, self.current) % len(positions)]
+        return self.items[self.current]
 
     def prev(self):
         """Получить предыдущее изображение"""
-        if not self.paths:
-            raise StopIteration("Нет изображений")
-
-        if self.counter <= 0:
-            self.counter = len(self.paths)  # Переходим к последнему
+        positions = self.filter_positions
+        if positions is None:
+            total = len(self.items)
+            if not total:
+                raise StopIteration("Нет изображений")
+            # До первого показа или с первого изображения переходим к последнему
+            self.current = self.current - 1 if self.current > 0 else total - 1
+        else:
+            if not positions:
+                raise StopIteration("Нет изображений")
+            row = bisect_left(positions, self.current) - 1 if self.current >= 0 else -1
+            self.current = positions[row]  # row = -1 - последнее с этой меткой
+        return self.items[self.current]
 
-        self.counter -= 1
-        path = self.paths[self.counter]
-        label = self.labels[self.counter] if self.counter < len(self.labels) else ""
+    def seek(self, row: int):
+        """Перейти к изображению с номером row (с учетом фильтра) и вернуть (путь, метка)"""
+        total = len(self)
+        if row < 0:
+            row += total
+        if not 0 <= row < total:
+            raise IndexError(f"Индекс {row} вне диапазона 0..{total - 1}")
 
-        return path, label
+        self.current = self.index(row)
+        return self.items[self.current]
 
     def get_current_info(self):
         """Получить информацию о текущем изображении"""
-        if not self.paths or self.counter == 0:
+        if self.current < 0:
             return None, ""
+        return self.items[self.current]
+
+    def current_index(self) -> int:
+        """Номер текущего изображения с учетом фильтра (-1, если оно не подходит под фильтр)"""
+        positions = self.filter_positions
+        if positions is None:
+            return self.current
+
+        row = bisect_left(positions, self.current)
+        if row < len(positions) and positions[row] == self.current:
+            return row
+        return -1
+
+    def adjacent_rows(self):
+        """Номера (с учетом фильтра), на которые перейдут next() и prev()"""
+        total = len(self)
+        positions = self.filter_positions
+        if positions is None:
+            next_row = self.current + 1
+            prev_row = self.current - 1 if self.current > 0 else total - 1
+        else:
+            next_row = bisect_right(positions, self.current)
+            prev_row = bisect_left(positions, self.current) - 1 if self.current >= 0 else total - 1
+        return next_row % total, prev_row % total
+
+    def neighbors(self, depth: int) -> list:
+        """Пути depth следующих и depth предыдущих изображений (для предзагрузки)"""
+        total = len(self)
+        if not total:
+            return []
+
+        next_row, prev_row = self.adjacent_rows()
+        paths = []
+        for step in range(min(depth, total)):
+            paths.append(self.path((next_row + step) % total))
+            paths.append(self.path((prev_row - step) % total))
+        return paths
+
+    def upcoming(self, count: int) -> list:
+        """Пути count изображений, которые будут показаны следующими, по порядку"""
+        total = len(self)
+        if not total:
+            return []
+
+        next_row, _ = self.adjacent_rows()
+        return [self.path((next_row + step) % total) for step in range(min(count, total))]
+
+    def advance(self, steps: int = 1):
+        """Перейти на steps изображений вперед (1 - как next()) и вернуть (путь, метка)"""
+        total = len(self)
+        if not total:
+            raise StopIteration("Нет изображений")
 
-        idx = self.counter - 1 if self.counter > 0 else len(self.paths) - 1
-        if 0 <= idx < len(self.paths):
-            return self.paths[idx], self.labels[idx] if idx < len(self.labels) else ""
-        return None, ""
+        next_row, _ = self.adjacent_rows()
+        return self.seek((next_row + steps - 1) % total)
 
-    def get_total(self):
-        """Получить общее количество изображений"""
-        return len(self.paths)
\ No newline at end of file
+    def get_total(self, all_items: bool = False):
+        """Получить количество изображений (с учетом фильтра или всех)"""
+        return len(self.items) if all_items else len(self)
\ No newline at end of file
@@ -0,0 +1,223 @@
+import argparse
+import csv
+import gc
+import os
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+from Iterator import ImageIterator
+from path_store import PathStore
+
+STARTUP_IMAGES = 16  # Для скольких первых записей CSV создаются настоящие файлы
+STARTUP_TIMEOUT = 120  # Сколько секунд ждать один запуск окна
+
+# Код, выполняемый в отдельном процессе для замера холодного старта.
+# Окно с ошибкой модальное и закрыть его некому, поэтому ошибка завершает процесс
+STARTUP_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+from PyQt5 import QtWidgets
+import main_window
+main_window.Ui_MainWindow.show_error = lambda self, message: sys.exit(message)
+imported = time.perf_counter()
+app = QtWidgets.QApplication(sys.argv)
+window = main_window.MainWindow()
+created = time.perf_counter()
+if len(sys.argv) > 1:
+    window.ui.set_iterator(main_window.ImageIterator(sys.argv[1]), sys.argv[1])
+loaded = time.perf_counter()
+print(imported - start, created - imported, loaded - created)
+"""
+
+
+def get_args() -> argparse.Namespace:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Замеры для просмотрщика датасетов")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000,
+                        help="Количество записей для замера памяти")
+    parser.add_argument("--labels", type=int, default=10,
+                        help="Количество различных меток")
+    parser.add_argument("--mode", choices=["memory", "csv", "startup"], default="memory",
+                        help="Что замерять: память хранилища, чтение CSV или запуск окна")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Количество повторов для замеров времени")
+    return parser.parse_args()
+
+
+def make_entries(count: int, labels: int, root: str = "/data"):
+    """Генератор путей и меток, похожих на реальный датасет"""
+    for i in range(count):
+        label = f"class_{i % labels}"
+        yield f"{root}/datasets/animals/{label}/image_{i:08d}.jpg", label
+
+
+def measure(build) -> tuple:
+    """Память (байт) и время построения структуры"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def build_lists(count: int, labels: int):
+    """Прежнее представление: два параллельных списка строк"""
+    paths, label_list = [], []
+    for path, label in make_entries(count, labels):
+        paths.append(path)
+        label_list.append(label)
+    return paths, label_list
+
+
+def build_store(count: int, labels: int) -> PathStore:
+    """Новое представление: PathStore"""
+    store = PathStore()
+    for path, label in make_entries(count, labels):
+        store.append(path, label)
+    return store
+
+
+def report_memory(count: int, labels: int):
+    """Сравнить списки и PathStore по памяти и скорости доступа"""
+    (paths, label_list), lists_size, lists_time = measure(lambda: build_lists(count, labels))
+    store, store_size, store_time = measure(lambda: build_store(count, labels))
+
+    indices = [random.randrange(count) for _ in range(100_000)]
+    start = time.perf_counter()
+    for i in indices:
+        paths[i], label_list[i]
+    lists_access = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in indices:
+        store[i]
+    store_access = time.perf_counter() - start
+
+    print(f"Записей: {count}, меток: {labels}")
+    print(f"  списки:    {lists_size / 2 ** 20:8.1f} МБ ({lists_size / count:.0f} Б/запись), "
+          f"построение {lists_time:.2f} с, 100k случайных чтений {lists_access * 1000:.0f} мс")
+    print(f"  PathStore: {store_size / 2 ** 20:8.1f} МБ ({store_size / count:.0f} Б/запись), "
+          f"построение {store_time:.2f} с, 100k случайных чтений {store_access * 1000:.0f} мс")
+    print(f"  экономия памяти: x{lists_size / store_size:.1f}")
+
+
+def write_csv(csv_path: str, count: int, labels: int, root: str = "/data"):
+    """CSV аннотация в формате лабораторной 2 (лишние столбцы тоже есть)"""
+    with open(csv_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["abs_path", "rel_path", "width", "height", "label"])
+        for i, (path, label) in enumerate(make_entries(count, labels, root)):
+            writer.writerow([path, os.path.relpath(path, root), 640 + i % 7, 480, label])
+
+
+def tiny_png(width: int = 64, height: int = 48) -> bytes:
+    """Серое PNG изображение (без сторонних библиотек)"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data)))
+
+    rows = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+def write_images(count: int, labels: int, root: str):
+    """Настоящие файлы для первых записей make_entries (показываются при запуске).
+    PNG под именем .jpg: Qt определяет формат по содержимому.
+    """
+    data = tiny_png()
+    for path, _ in make_entries(min(count, STARTUP_IMAGES), labels, root):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+
+
+def best_time(func, repeat: int) -> float:
+    """Лучшее время выполнения func, с"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report_csv(count: int, labels: int, repeat: int):
+    """Сравнить загрузку CSV итератором и полное чтение через pandas"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, "annotation.csv")
+        write_csv(csv_path, count, labels)
+        print(f"CSV: {count} строк, {os.path.getsize(csv_path) / 2 ** 20:.1f} МБ")
+
+        iterator_time = best_time(lambda: ImageIterator(csv_path), repeat)
+        print(f"  ImageIterator:      {iterator_time * 1000:8.0f} мс")
+
+        # Импорт pandas замеряется в отдельном процессе, в этом он мог быть уже загружен
+        command = [sys.executable, "-c",
+                   "import time; s = time.perf_counter(); import pandas; print(time.perf_counter() - s)"]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode:
+            print("  pandas не установлен, сравнение пропущено")
+            return
+        import pandas as pd
+        pandas_time = best_time(lambda: pd.read_csv(csv_path), repeat)
+        print(f"  import pandas:      {float(result.stdout) * 1000:8.0f} мс")
+        print(f"  pandas.read_csv:    {pandas_time * 1000:8.0f} мс")
+
+
+def report_startup(count: int, labels: int, repeat: int):
+    """Холодный старт окна: импорт модулей, создание окна, открытие CSV"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    folder = os.path.dirname(os.path.abspath(__file__))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, "annotation.csv")
+        write_csv(csv_path, count, labels, temp_dir)
+        write_images(count, labels, temp_dir)
+
+        for title, extra in (("без датасета", []), (f"с CSV на {count} строк", [csv_path])):
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                try:
+                    result = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET, *extra],
+                                            cwd=folder, env=env, capture_output=True, text=True,
+                                            timeout=STARTUP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    print(f"Запуск {title} не завершился за {STARTUP_TIMEOUT} с")
+                    return
+                total = time.perf_counter() - start
+                if result.returncode:
+                    print(f"Не удалось запустить окно: {result.stderr.strip().splitlines()[-1:]}")
+                    return
+                runs.append((total, *map(float, result.stdout.split()[-3:])))
+
+            total, imported, created, loaded = min(runs)
+            print(f"Запуск {title}: процесс {total * 1000:.0f} мс "
+                  f"(импорт {imported * 1000:.0f} мс, окно {created * 1000:.0f} мс, "
+                  f"загрузка {loaded * 1000:.0f} мс)")
+
+
+def main() -> None:
+    """Основная функция"""
+    args = get_args()
+    if args.mode == "memory":
+        report_memory(args.count, args.labels)
+    elif args.mode == "csv":
+        report_csv(args.count, args.labels, args.repeat)
+    else:
+        report_startup(args.count, args.labels, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
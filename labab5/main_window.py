@@ -1,6 +1,18 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from Iterator import ImageIterator
+from prefetch import Prefetcher
+from thumbnails import THUMBNAIL_SIZE, ThumbnailModel
+from collections import deque
 import os
+import time
+
+PREFETCH_DEPTH = 3  # Сколько соседних изображений подгружать в каждую сторону
+CACHE_BYTES = 256 * 1024 * 1024  # Размер кэша декодированных изображений
+RESIZE_DELAY_MS = 150  # Пауза после последнего изменения размера до качественного масштабирования
+LOADING_POLL_MS = 200  # Как часто обновлять интерфейс, пока папка загружается
+SLIDESHOW_FPS = 5  # Скорость слайд-шоу по умолчанию, кадров в секунду
+SLIDESHOW_LOOKAHEAD = 8  # Сколько кадров вперед искать в кэше и подгружать при показе
+FPS_WINDOW = 30  # По скольким последним кадрам считать реальную скорость
 
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
@@ -62,6 +74,17 @@ class Ui_MainWindow(object):
         self.counter_label.setAlignment(QtCore.Qt.AlignRight)
         self.info_layout.addWidget(self.counter_label)
 
+        # Статистика кэша предзагрузки
+        self.cache_label = QtWidgets.QLabel("")
+        self.cache_label.setStyleSheet("""
+            QLabel {
+                color: #7e7e7e;
+                font-size: 11px;
+            }
+        """)
+        self.cache_label.setAlignment(QtCore.Qt.AlignRight)
+        self.info_layout.addWidget(self.cache_label)
+
         self.main_layout.addWidget(self.info_panel)
 
         # Область для изображения
@@ -115,6 +138,32 @@ class Ui_MainWindow(object):
 
         self.main_layout.addWidget(self.image_frame, 1)  # 1 для растяжения
 
+        # Лента миниатюр: QListView рисует только видимые элементы
+        self.thumbnail_model = ThumbnailModel(MainWindow)
+        self.thumbnail_view = QtWidgets.QListView()
+        self.thumbnail_view.setViewMode(QtWidgets.QListView.IconMode)
+        self.thumbnail_view.setFlow(QtWidgets.QListView.LeftToRight)
+        self.thumbnail_view.setWrapping(False)
+        self.thumbnail_view.setMovement(QtWidgets.QListView.Static)
+        self.thumbnail_view.setUniformItemSizes(True)
+        self.thumbnail_view.setLayoutMode(QtWidgets.QListView.Batched)
+        self.thumbnail_view.setBatchSize(500)
+        self.thumbnail_view.setIconSize(QtCore.QSize(THUMBNAIL_SIZE * 3 // 4, THUMBNAIL_SIZE * 3 // 4))
+        self.thumbnail_view.setFixedHeight(THUMBNAIL_SIZE)
+        self.thumbnail_view.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOn)
+        self.thumbnail_view.setStyleSheet("""
+            QListView {
+                background-color: #252526;
+                border-radius: 10px;
+                border: 1px solid #3e3e42;
+            }
+            QListView::item:selected {
+                background-color: #007acc;
+            }
+        """)
+        self.thumbnail_view.setModel(self.thumbnail_model)
+        self.main_layout.addWidget(self.thumbnail_view)
+
         # Панель управления
         self.control_panel = QtWidgets.QFrame()
         self.control_panel.setStyleSheet("""
@@ -138,6 +187,26 @@ class Ui_MainWindow(object):
         self.select_csv_button = self.create_button("📄 Выбрать CSV", "#68217a")
         self.button_layout.addWidget(self.select_csv_button)
 
+        # Искать изображения во вложенных папках
+        self.recursive_checkbox = QtWidgets.QCheckBox("Подпапки")
+        self.recursive_checkbox.setStyleSheet("QCheckBox { color: #cccccc; font-size: 13px; }")
+        self.button_layout.addWidget(self.recursive_checkbox)
+
+        # Фильтр по классу (для CSV с метками)
+        self.label_combo = QtWidgets.QComboBox()
+        self.label_combo.setMinimumHeight(35)
+        self.label_combo.setStyleSheet("""
+            QComboBox {
+                background-color: #3e3e42;
+                color: #cccccc;
+                border-radius: 5px;
+                font-size: 13px;
+                padding: 4px 10px;
+            }
+        """)
+        self.label_combo.setVisible(False)
+        self.button_layout.addWidget(self.label_combo)
+
         self.control_layout.addLayout(self.button_layout)
 
         # Панель навигации
@@ -148,6 +217,28 @@ class Ui_MainWindow(object):
         self.prev_button.setEnabled(False)
         self.nav_layout.addWidget(self.prev_button)
 
+        # Слайд-шоу: кнопка пуска и скорость
+        self.play_button = self.create_button("▶ Слайд-шоу", "#4ec9b0", 40)
+        self.play_button.setCheckable(True)
+        self.play_button.setEnabled(False)
+        self.nav_layout.addWidget(self.play_button)
+
+        self.fps_spinbox = QtWidgets.QSpinBox()
+        self.fps_spinbox.setRange(1, 60)
+        self.fps_spinbox.setValue(SLIDESHOW_FPS)
+        self.fps_spinbox.setSuffix(" кадр/с")
+        self.fps_spinbox.setMinimumHeight(40)
+        self.fps_spinbox.setStyleSheet("""
+            QSpinBox {
+                background-color: #3e3e42;
+                color: #cccccc;
+                border-radius: 5px;
+                font-size: 13px;
+                padding: 4px 10px;
+            }
+        """)
+        self.nav_layout.addWidget(self.fps_spinbox)
+
         # Кнопка Следующий
         self.next_button = self.create_button("Следующий ▶", "#569cd6", 40)
         self.next_button.setEnabled(False)
@@ -163,10 +254,39 @@ class Ui_MainWindow(object):
         self.select_csv_button.clicked.connect(self.open_csv)
         self.prev_button.clicked.connect(self.show_prev)
         self.next_button.clicked.connect(self.show_next)
+        self.thumbnail_view.clicked.connect(self.show_thumbnail)
+        self.label_combo.currentIndexChanged.connect(self.change_filter)
+        self.play_button.toggled.connect(self.toggle_slideshow)
+        self.fps_spinbox.valueChanged.connect(self.set_slideshow_fps)
 
         self.main_window = MainWindow
         self.current_image_path = None
         self.image_iterator = None
+        self.source_name = ""
+
+        # Фоновое декодирование соседних изображений
+        self.prefetcher = Prefetcher(CACHE_BYTES, parent=MainWindow)
+        self.prefetcher.image_ready.connect(self.update_cache_stats)
+
+        # Исходное изображение в памяти, чтобы не декодировать его при каждом resize
+        self.source_pixmap = None
+        self.resize_timer = QtCore.QTimer(MainWindow)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DELAY_MS)
+        self.resize_timer.timeout.connect(self.rescale_smooth)
+
+        # Пока папка перечисляется в фоне, периодически обновляем счетчики
+        self.loading_timer = QtCore.QTimer(MainWindow)
+        self.loading_timer.setInterval(LOADING_POLL_MS)
+        self.loading_timer.timeout.connect(self.update_loading)
+
+        # Слайд-шоу: кадр показывается, только если он уже декодирован в фоне
+        self.slideshow_timer = QtCore.QTimer(MainWindow)
+        self.slideshow_timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.slideshow_timer.timeout.connect(self.slideshow_tick)
+        self.frame_times = deque(maxlen=FPS_WINDOW)  # Моменты показа последних кадров
+        self.skipped_frames = 0  # Кадры, через которые перескочили, чтобы успеть
+        self.dropped_frames = 0  # Такты, на которых показать было нечего
 
     def create_button(self, text, color, height=35):
         """Создает стилизованную кнопку"""
@@ -229,10 +349,7 @@ class Ui_MainWindow(object):
 
         if folder:
             try:
-                self.image_iterator = ImageIterator(folder)
-                self.update_status(f"Загружено {self.image_iterator.get_total()} изображений из папки", "#4ec9b0")
-                self.update_controls(True)
-                self.show_next()
+                self.set_iterator(ImageIterator(folder, self.recursive_checkbox.isChecked()), "папки")
             except Exception as e:
                 self.show_error(f"Ошибка загрузки папки: {str(e)}")
 
@@ -247,13 +364,124 @@ class Ui_MainWindow(object):
 
         if file_path:
             try:
-                self.image_iterator = ImageIterator(file_path)
-                self.update_status(f"Загружено {self.image_iterator.get_total()} изображений из CSV", "#4ec9b0")
-                self.update_controls(True)
-                self.show_next()
+                self.set_iterator(ImageIterator(file_path), "CSV")
             except Exception as e:
                 self.show_error(f"Ошибка загрузки CSV: {str(e)}")
 
+    def set_iterator(self, image_iterator, source_name):
+        """Переключиться на новый датасет"""
+        if self.image_iterator:
+            self.image_iterator.close()
+
+        self.image_iterator = image_iterator
+        self.source_name = source_name
+        self.prefetcher.clear()
+        self.thumbnail_model.set_iterator(self.image_iterator)
+        self.fill_label_combo()
+        self.update_controls(True)
+        self.show_next()
+
+        if self.image_iterator.loading:
+            self.loading_timer.start()
+        self.update_loading()
+
+    def fill_label_combo(self):
+        """Заполнить список классов с количеством изображений"""
+        counts = self.image_iterator.label_counts()
+        self.label_combo.blockSignals(True)
+        self.label_combo.clear()
+        self.label_combo.addItem(f"Все классы ({self.image_iterator.get_total(True)})", None)
+        for label in sorted(counts):
+            self.label_combo.addItem(f"{label or '(без метки)'} ({counts[label]})", label)
+        self.label_combo.blockSignals(False)
+        # Для папок меток нет - фильтровать нечего
+        self.label_combo.setVisible(any(counts))
+
+    def change_filter(self, combo_index):
+        """Показывать только выбранный класс"""
+        if not self.image_iterator or combo_index < 0:
+            return
+
+        self.image_iterator.set_filter(self.label_combo.itemData(combo_index))
+        self.thumbnail_model.set_iterator(self.image_iterator)
+        if self.image_iterator.current_index() < 0:
+            self.show_next()  # Текущее изображение другого класса - переходим к ближайшему
+        else:
+            self.display_image(*self.image_iterator.get_current_info())
+
+    def toggle_slideshow(self, playing):
+        """Запустить или остановить слайд-шоу"""
+        if playing and self.image_iterator:
+            self.frame_times.clear()
+            self.skipped_frames = 0
+            self.dropped_frames = 0
+            self.play_button.setText("⏸ Пауза")
+            self.set_slideshow_fps(self.fps_spinbox.value())
+            self.prefetcher.prefetch(self.image_iterator.upcoming(SLIDESHOW_LOOKAHEAD))
+            self.slideshow_timer.start()
+        else:
+            self.slideshow_timer.stop()
+            self.play_button.setText("▶ Слайд-шоу")
+            if self.image_iterator:
+                self.update_loading()
+
+    def set_slideshow_fps(self, fps):
+        """Изменить скорость слайд-шоу"""
+        self.slideshow_timer.setInterval(max(1, round(1000 / fps)))
+
+    def slideshow_tick(self):
+        """Такт слайд-шоу. GUI поток не ждет декодирования: показывается ближайший
+        уже готовый кадр (отстающие пропускаются), а если готовых нет - такт сбрасывается.
+        """
+        if not self.image_iterator:
+            return
+
+        upcoming = self.image_iterator.upcoming(SLIDESHOW_LOOKAHEAD)
+        ready = next((step for step, path in enumerate(upcoming) if path in self.prefetcher.cache), None)
+        if ready is None:
+            self.dropped_frames += 1
+            self.prefetcher.prefetch(upcoming)
+        else:
+            self.skipped_frames += ready
+            image_path, label = self.image_iterator.advance(ready + 1)
+            self.display_image(image_path, label)
+            self.frame_times.append(time.perf_counter())
+            self.prefetcher.prefetch(self.image_iterator.upcoming(SLIDESHOW_LOOKAHEAD))
+        self.update_slideshow_status()
+
+    def update_slideshow_status(self):
+        """Показать реальную скорость слайд-шоу"""
+        if len(self.frame_times) > 1:
+            fps = (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+        else:
+            fps = 0.0
+        target = self.fps_spinbox.value()
+        color = "#4ec9b0" if fps >= 0.9 * target else "#d7ba7d"
+        self.update_status(
+            f"▶ {fps:.1f}/{target} кадр/с, декодирование {self.prefetcher.average_decode_ms():.1f} мс, "
+            f"пропущено {self.skipped_frames}, сброшено {self.dropped_frames}",
+            color
+        )
+
+    def update_loading(self):
+        """Обновить интерфейс по мере фоновой загрузки папки"""
+        if not self.image_iterator:
+            self.loading_timer.stop()
+            return
+
+        total = self.image_iterator.get_total()
+        self.thumbnail_model.refresh_count()
+        self.update_counter()
+        if not self.image_iterator.loading:
+            self.loading_timer.stop()
+        if self.slideshow_timer.isActive():
+            return  # Строку статуса занимает слайд-шоу
+
+        if self.image_iterator.loading:
+            self.update_status(f"Загрузка... найдено {total} изображений", "#d7ba7d")
+        else:
+            self.update_status(f"Загружено {total} изображений из {self.source_name}", "#4ec9b0")
+
     def show_next(self):
         """Показать следующее изображение"""
         if not self.image_iterator:
@@ -263,9 +491,7 @@ class Ui_MainWindow(object):
             image_path, label = next(self.image_iterator)
             self.display_image(image_path, label)
         except StopIteration:
-            self.image_iterator.counter = 0
-            if self.image_iterator.paths:
-                self.show_next()
+            pass
 
     def show_prev(self):
         """Показать предыдущее изображение"""
@@ -278,35 +504,36 @@ class Ui_MainWindow(object):
         except StopIteration:
             pass
 
+    def show_thumbnail(self, index):
+        """Показать изображение, выбранное в ленте миниатюр"""
+        if not self.image_iterator or not index.isValid():
+            return
+
+        image_path, label = self.image_iterator.seek(index.row())
+        self.display_image(image_path, label)
+
     def display_image(self, image_path, label=""):
         """Отобразить изображение с информацией"""
         if not image_path:
             return
 
-        # Загружаем изображение
-        pixmap = QtGui.QPixmap(image_path)
-        if pixmap.isNull():
+        # Берем изображение из кэша, при промахе декодируем сразу
+        image = self.prefetcher.get(image_path)
+        if image is None:
+            image = self.prefetcher.load(image_path)
+        if image.isNull():
             self.show_error(f"Не удалось загрузить изображение:\n{image_path}")
             return
+        self.source_pixmap = QtGui.QPixmap.fromImage(image)
 
         # Масштабируем с сохранением пропорций
-        label_size = self.picture.size()
-        scaled_pixmap = pixmap.scaled(
-            label_size,
-            QtCore.Qt.KeepAspectRatio,
-            QtCore.Qt.SmoothTransformation
-        )
-
-        self.picture.setPixmap(scaled_pixmap)
+        self.scale_picture(QtCore.Qt.SmoothTransformation)
         self.current_image_path = image_path
 
         # Обновляем информацию
         filename = os.path.basename(image_path)
-        current_idx = self.image_iterator.counter if self.image_iterator.counter > 0 else self.image_iterator.get_total()
-        total = self.image_iterator.get_total()
-
         self.filename_label.setText(f"📄 {filename}")
-        self.counter_label.setText(f"{current_idx}/{total}")
+        self.update_counter()
 
         if label:
             self.class_label.setText(f"🏷️  Класс: {label}")
@@ -316,6 +543,28 @@ class Ui_MainWindow(object):
         # Центрируем изображение
         self.picture.setAlignment(QtCore.Qt.AlignCenter)
 
+        # Выделяем текущее изображение в ленте миниатюр
+        thumbnail_index = self.thumbnail_model.index(self.image_iterator.current_index())
+        self.thumbnail_view.setCurrentIndex(thumbnail_index)
+        self.thumbnail_view.scrollTo(thumbnail_index, QtWidgets.QAbstractItemView.PositionAtCenter)
+
+        # Подгружаем соседей, пока пользователь смотрит на текущее
+        self.prefetcher.prefetch(self.image_iterator.neighbors(PREFETCH_DEPTH))
+        self.update_cache_stats()
+
+    def update_cache_stats(self, *args):
+        """Обновить статистику кэша"""
+        self.cache_label.setText(self.prefetcher.stats_text())
+
+    def update_counter(self):
+        """Обновить счетчик "текущее/всего" """
+        current_idx = self.image_iterator.current_index() + 1
+        total = self.image_iterator.get_total()
+        suffix = "…" if self.image_iterator.loading else ""
+        if self.image_iterator.filter_label is not None:
+            suffix += f" (всего {self.image_iterator.get_total(True)})"
+        self.counter_label.setText(f"{current_idx}/{total}{suffix}")
+
     def update_status(self, message, color="#cccccc"):
         """Обновить статус"""
         self.status_label.setText(message)
@@ -325,6 +574,7 @@ class Ui_MainWindow(object):
         """Обновить состояние кнопок навигации"""
         self.prev_button.setEnabled(enabled)
         self.next_button.setEnabled(enabled)
+        self.play_button.setEnabled(enabled)
 
     def show_error(self, message):
         """Показать сообщение об ошибке"""
@@ -335,22 +585,27 @@ class Ui_MainWindow(object):
         )
         self.update_status("Произошла ошибка", "#f44747")
 
+    def scale_picture(self, mode):
+        """Вписать исходное изображение в область просмотра"""
+        if self.source_pixmap is None:
+            return
+        scaled_pixmap = self.source_pixmap.scaled(
+            self.picture.size(),
+            QtCore.Qt.KeepAspectRatio,
+            mode
+        )
+        self.picture.setPixmap(scaled_pixmap)
+
+    def rescale_smooth(self):
+        """Качественное масштабирование после окончания изменения размера"""
+        self.scale_picture(QtCore.Qt.SmoothTransformation)
+
     def resizeEvent(self, event):
         """Обработчик изменения размера окна"""
-        if self.current_image_path and self.image_iterator:
-            # Получаем текущее изображение и метку
-            current_path, current_label = self.image_iterator.get_current_info()
-            if current_path:
-                pixmap = QtGui.QPixmap(current_path)
-                if not pixmap.isNull():
-                    label_size = self.picture.size()
-                    scaled_pixmap = pixmap.scaled(
-                        label_size,
-                        QtCore.Qt.KeepAspectRatio,
-                        QtCore.Qt.SmoothTransformation
-                    )
-                    self.picture.setPixmap(scaled_pixmap)
-        super(type(self.main_window), self.main_window).resizeEvent(event)
+        if self.source_pixmap is not None:
+            # Во время перетаскивания - быстрый предпросмотр, сглаживание - когда размер устоится
+            self.scale_picture(QtCore.Qt.FastTransformation)
+            self.resize_timer.start()
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -368,11 +623,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if os.path.exists(default_image):
             pixmap = QtGui.QPixmap(default_image)
             if not pixmap.isNull():
-                self.ui.picture.setPixmap(pixmap.scaled(
-                    self.ui.picture.size(),
-                    QtCore.Qt.KeepAspectRatio,
-                    QtCore.Qt.SmoothTransformation
-                ))
+                self.ui.source_pixmap = pixmap
+                self.ui.rescale_smooth()
 
     def resizeEvent(self, event):
         """Передаем событие изменения размера в UI"""
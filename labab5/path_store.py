@@ -0,0 +1,73 @@
+from array import array
+
+
+class PathStore:
+    """Компактное хранилище путей и меток.
+    Все пути лежат подряд в одном UTF-8 буфере, границы - в массиве смещений,
+    метки хранятся кодами категорий. На запись уходит ~16 байт сверх самого пути
+    (смещение, код метки и позиция в индексе метки) вместо двух Python-строк на элемент.
+    Для каждой метки ведется индекс - отсортированный массив позиций ее элементов.
+    """
+
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = array('Q', [0])
+        self.codes = array('I')
+        self.label_names = []  # код -> метка
+        self.label_codes = {}  # метка -> код
+        self.positions = []  # код -> array('I') позиций элементов с этой меткой
+
+    def __len__(self) -> int:
+        # codes дописывается последним, поэтому элемент виден только целиком
+        return len(self.codes)
+
+    def append(self, path: str, label: str = ""):
+        """Добавить путь с меткой"""
+        code = self.label_codes.get(label)
+        if code is None:
+            code = len(self.label_names)
+            self.label_names.append(label)
+            self.label_codes[label] = code
+            self.positions.append(array('I'))
+
+        self.positions[code].append(len(self.codes))
+        self.blob += path.encode('utf-8', 'surrogateescape')
+        self.offsets.append(len(self.blob))
+        self.codes.append(code)
+
+    def path(self, index: int) -> str:
+        """Путь по индексу"""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.blob[start:end].decode('utf-8', 'surrogateescape')
+
+    def label(self, index: int) -> str:
+        """Метка по индексу"""
+        return self.label_names[self.codes[index]]
+
+    def label_positions(self, label: str) -> array:
+        """Отсортированные позиции элементов с меткой label (KeyError, если ее нет)"""
+        return self.positions[self.label_codes[label]]
+
+    def label_counts(self) -> dict:
+        """Количество элементов для каждой метки"""
+        return {name: len(self.positions[code]) for code, name in enumerate(self.label_names)}
+
+    def __getitem__(self, index):
+        """(путь, метка) по индексу или список таких пар по срезу"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        total = len(self)
+        if index < 0:
+            index += total
+        if not 0 <= index < total:
+            raise IndexError(f"Индекс {index} вне диапазона 0..{total - 1}")
+        return self.path(index), self.label(index)
+
+    def nbytes(self) -> int:
+        """Примерный объем памяти под данные"""
+        return (len(self.blob)
+                + self.offsets.itemsize * len(self.offsets)
+                + self.codes.itemsize * len(self.codes)
+                + sum(positions.itemsize * len(positions) for positions in self.positions)
+                + sum(len(name) for name in self.label_names))
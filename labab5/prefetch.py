@@ -0,0 +1,151 @@
+import time
+from collections import OrderedDict
+
+from PyQt5 import QtCore, QtGui
+
+
+class ImageCache:
+    """LRU кэш декодированных изображений с ограничением по размеру в байтах"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.images = OrderedDict()
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.images
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def get(self, path: str):
+        """Получить изображение из кэша или None"""
+        image = self.images.get(path)
+        if image is not None:
+            self.images.move_to_end(path)
+        return image
+
+    def put(self, path: str, image: QtGui.QImage):
+        """Положить изображение в кэш, вытесняя самые старые"""
+        if path in self.images:
+            self.size -= self.images.pop(path).sizeInBytes()
+
+        image_size = image.sizeInBytes()
+        if image_size > self.max_bytes:
+            return  # Такое изображение в кэш не поместится
+
+        self.images[path] = image
+        self.size += image_size
+        while self.size > self.max_bytes:
+            _, old_image = self.images.popitem(last=False)
+            self.size -= old_image.sizeInBytes()
+
+    def clear(self):
+        """Очистить кэш"""
+        self.images.clear()
+        self.size = 0
+
+
+class DecodeSignals(QtCore.QObject):
+    """Сигналы задачи декодирования (QRunnable сам сигналы иметь не может)"""
+    finished = QtCore.pyqtSignal(str, QtGui.QImage, float)
+
+
+class DecodeTask(QtCore.QRunnable):
+    """Декодирование изображения в QImage в потоке из QThreadPool"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.signals = DecodeSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        image = QtGui.QImage(self.path)
+        elapsed = time.perf_counter() - start
+        self.signals.finished.emit(self.path, image, elapsed)
+
+
+class Prefetcher(QtCore.QObject):
+    """Фоновая подгрузка соседних изображений в LRU кэш.
+    QImage можно создавать вне GUI потока, в QPixmap он превращается уже при показе.
+    """
+    image_ready = QtCore.pyqtSignal(str)
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, threads: int = 2, parent=None):
+        super().__init__(parent)
+        self.cache = ImageCache(max_bytes)
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(threads)
+        self.pending = {}  # path -> задача, которая сейчас декодирует
+
+        # Статистика
+        self.hits = 0
+        self.misses = 0
+        self.decode_count = 0
+        self.decode_time = 0.0
+
+    def get(self, path: str):
+        """Взять изображение из кэша (учитывается в статистике попаданий)"""
+        image = self.cache.get(path)
+        if image is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return image
+
+    def load(self, path: str) -> QtGui.QImage:
+        """Синхронно декодировать изображение (при промахе кэша)"""
+        start = time.perf_counter()
+        image = QtGui.QImage(path)
+        self.add_decode_time(time.perf_counter() - start)
+        if not image.isNull():
+            self.cache.put(path, image)
+        return image
+
+    def prefetch(self, paths: list):
+        """Поставить в очередь декодирование изображений, которых нет в кэше"""
+        for path in paths:
+            if not path or path in self.cache or path in self.pending:
+                continue
+            task = DecodeTask(path)
+            task.signals.finished.connect(self.on_decoded)
+            self.pending[path] = task
+            self.pool.start(task)
+
+    def on_decoded(self, path: str, image: QtGui.QImage, elapsed: float):
+        """Результат фонового декодирования (вызывается в GUI потоке)"""
+        self.pending.pop(path, None)
+        self.add_decode_time(elapsed)
+        if not image.isNull():
+            self.cache.put(path, image)
+            self.image_ready.emit(path)
+
+    def add_decode_time(self, elapsed: float):
+        """Учесть время декодирования"""
+        self.decode_count += 1
+        self.decode_time += elapsed
+
+    def hit_rate(self) -> float:
+        """Доля попаданий в кэш, %"""
+        total = self.hits + self.misses
+        return 100.0 * self.hits / total if total else 0.0
+
+    def average_decode_ms(self) -> float:
+        """Среднее время декодирования, мс"""
+        return 1000.0 * self.decode_time / self.decode_count if self.decode_count else 0.0
+
+    def stats_text(self) -> str:
+        """Строка статистики для интерфейса"""
+        return (f"Кэш: {self.hit_rate():.0f}% попаданий, "
+                f"{len(self.cache)} изобр. / {self.cache.size // (1024 * 1024)} МБ, "
+                f"декодирование {self.average_decode_ms():.1f} мс")
+
+    def clear(self):
+        """Сбросить кэш и статистику (например, при открытии нового датасета)"""
+        self.pool.clear()
+        self.pending.clear()
+        self.cache.clear()
+        self.hits = self.misses = 0
+        self.decode_count = 0
+        self.decode_time = 0.0
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+
+from PyQt5 import QtCore, QtGui
+
+THUMBNAIL_SIZE = 128  # Размер "normal" по спецификации freedesktop
+MEMORY_THUMBNAILS = 2000  # Сколько миниатюр держать в памяти
+
+
+class ThumbnailCache:
+    """Дисковый кэш миниатюр по образцу freedesktop thumbnail spec:
+    PNG с именем md5(URI) и метаданными Thumb::URI и Thumb::MTime.
+    Если папку кэша создать нельзя, миниатюры хранятся только в памяти.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        if cache_dir is None:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            cache_dir = os.path.join(base, "thumbnails", "normal")
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            cache_dir = None  # Например, домашняя папка только для чтения
+        self.cache_dir = cache_dir
+
+    def locate(self, path: str):
+        """URI изображения и путь к файлу миниатюры"""
+        uri = pathlib.Path(os.path.abspath(path)).as_uri()
+        name = hashlib.md5(uri.encode("utf-8")).hexdigest() + ".png"
+        return uri, os.path.join(self.cache_dir, name)
+
+    def load(self, path: str):
+        """Миниатюра из кэша или None, если ее нет или файл изменился"""
+        if self.cache_dir is None:
+            return None
+        try:
+            mtime = str(int(os.stat(path).st_mtime))
+        except OSError:
+            return None
+
+        _, thumbnail_path = self.locate(path)
+        if not os.path.exists(thumbnail_path):
+            return None
+
+        image = QtGui.QImage(thumbnail_path)
+        if image.isNull() or image.text("Thumb::MTime") != mtime:
+            return None
+        return image
+
+    def save(self, path: str, image: QtGui.QImage):
+        """Сохранить миниатюру (через временный файл, чтобы не оставить битый PNG)"""
+        if self.cache_dir is None:
+            return
+        try:
+            mtime = str(int(os.stat(path).st_mtime))
+        except OSError:
+            return
+
+        uri, thumbnail_path = self.locate(path)
+        image.setText("Thumb::URI", uri)
+        image.setText("Thumb::MTime", mtime)
+        temp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if image.save(temp_path, "PNG"):
+            try:
+                os.replace(temp_path, thumbnail_path)
+            except OSError:
+                pass
+
+
+def make_thumbnail(path: str, size: int = THUMBNAIL_SIZE) -> QtGui.QImage:
+    """Декодировать изображение сразу в уменьшенном размере"""
+    reader = QtGui.QImageReader(path)
+    reader.setAutoTransform(True)
+    image_size = reader.size()
+    if image_size.isValid():
+        image_size.scale(size, size, QtCore.Qt.KeepAspectRatio)
+        reader.setScaledSize(image_size)
+    image = reader.read()
+    if not image.isNull() and max(image.width(), image.height()) > size:
+        image = image.scaled(size, size, QtCore.Qt.KeepAspectRatio,
+                             QtCore.Qt.SmoothTransformation)
+    return image
+
+
+class ThumbnailSignals(QtCore.QObject):
+    """Сигналы задачи построения миниатюры"""
+    finished = QtCore.pyqtSignal(int, str, QtGui.QImage)
+
+
+class ThumbnailTask(QtCore.QRunnable):
+    """Загрузка миниатюры из кэша или ее построение в фоновом потоке"""
+
+    def __init__(self, row: int, path: str, cache: ThumbnailCache):
+        super().__init__()
+        self.row = row
+        self.path = path
+        self.cache = cache
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+        image = self.cache.load(self.path)
+        if image is None:
+            image = make_thumbnail(self.path)
+            if not image.isNull():
+                self.cache.save(self.path, image)
+        self.signals.finished.emit(self.row, self.path, image)
+
+
+class ThumbnailModel(QtCore.QAbstractListModel):
+    """Модель ленты миниатюр. QListView запрашивает данные только видимых строк,
+    поэтому миниатюры строятся лишь для того, что на экране.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image_iterator = None
+        self.count = 0
+        self.pixmaps = OrderedDict()  # path -> QPixmap, LRU
+        self.requested = set()
+        self.priority = 0
+        self.disk_cache = ThumbnailCache()
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        self.placeholder = QtGui.QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        self.placeholder.fill(QtGui.QColor("#3e3e42"))
+
+    def set_iterator(self, image_iterator):
+        """Показать изображения нового датасета"""
+        self.beginResetModel()
+        self.pool.clear()
+        self.requested.clear()
+        self.image_iterator = image_iterator
+        self.count = image_iterator.get_total() if image_iterator else 0
+        self.endResetModel()
+
+    def refresh_count(self):
+        """Добавить строки для изображений, найденных после загрузки модели"""
+        if self.image_iterator is None:
+            return
+        total = self.image_iterator.get_total()
+        if total > self.count:
+            self.beginInsertRows(QtCore.QModelIndex(), self.count, total - 1)
+            self.count = total
+            self.endInsertRows()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or self.image_iterator is None:
+            return None
+
+        path = self.image_iterator.path(index.row())
+        if role == QtCore.Qt.DecorationRole:
+            pixmap = self.pixmaps.get(path)
+            if pixmap is not None:
+                self.pixmaps.move_to_end(path)
+                return pixmap
+            self.request(index.row(), path)
+            return self.placeholder
+        if role == QtCore.Qt.ToolTipRole:
+            return path
+        return None
+
+    def request(self, row: int, path: str):
+        """Поставить построение миниатюры в очередь"""
+        if path in self.requested:
+            return
+        self.requested.add(path)
+        task = ThumbnailTask(row, path, self.disk_cache)
+        task.signals.finished.connect(self.on_thumbnail)
+        # Последние запросы (то, что сейчас на экране) выполняются первыми
+        self.priority += 1
+        self.pool.start(task, self.priority)
+
+    def on_thumbnail(self, row: int, path: str, image: QtGui.QImage):
+        """Миниатюра готова (вызывается в GUI потоке)"""
+        self.requested.discard(path)
+        if self.image_iterator is None or row >= self.count:
+            return
+        if self.image_iterator.path(row) != path:
+            return  # Пока строили миниатюру, датасет сменился
+
+        self.pixmaps[path] = QtGui.QPixmap.fromImage(image) if not image.isNull() else self.placeholder
+        while len(self.pixmaps) > MEMORY_THUMBNAILS:
+            self.pixmaps.popitem(last=False)
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DecorationRole])
\ No newline at end of file
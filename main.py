@@ -6,7 +6,7 @@ from datetime import datetime
 # Добавляем текущую директорию в путь Python
 sys.path.insert(0, os.path.dirname(__file__))
 
-from image_crawler.image_downloader import download_images
+from image_crawler.image_downloader import download_images, read_url_list
 from image_crawler.csv_annotator import create_annotation_csv
 from image_crawler.iterators import ImagePathIterator
 
@@ -18,6 +18,11 @@ def main():
     parser.add_argument('--date-from', type=str, required=True)
     parser.add_argument('--date-to', type=str, required=True)
     parser.add_argument('--max-num', type=int, default=100)
+    parser.add_argument('--urls', type=str, default=None,
+                        help='Файл со списком URL изображений (без него создаются тестовые файлы)')
+    parser.add_argument('--workers', type=int, default=8, help='Количество потоков загрузки')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='Максимум одновременных запросов к одному хосту')
 
     args = parser.parse_args()
 
@@ -29,13 +34,24 @@ def main():
         print("Ошибка: используйте формат даты ГГГГ-ММ-ДД")
         return
 
+    urls = None
+    if args.urls:
+        try:
+            urls = read_url_list(args.urls)
+        except OSError as e:
+            print(f"Ошибка чтения списка URL: {e}")
+            return
+
     # Скачиваем изображения
     download_images(
         keyword='horse',
         date_from=args.date_from,
         date_to=args.date_to,
         max_num=args.max_num,
-        save_dir=args.storage_dir
+        save_dir=args.storage_dir,
+        urls=urls,
+        workers=args.workers,
+        per_host=args.per_host
     )
 
     # Создаем аннотацию
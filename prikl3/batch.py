@@ -0,0 +1,101 @@
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+import image
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+PATH_COLUMNS = ['Absolute Path', 'absolute_path', 'Relative Path', 'path', 'filename']
+
+
+def collect_images(source: str) -> list[str]:
+    """Collect image paths from folder or annotation CSV"""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    with open(source, 'r', newline='', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        columns = reader.fieldnames or []
+        column = next((name for name in PATH_COLUMNS if name in columns), None)
+        if column is None:
+            if not columns:
+                return []
+            column = columns[0]  # Берем первый столбец
+        paths = [row[column] for row in reader if row[column]]
+
+    # Относительные пути считаем от папки с CSV
+    base = os.path.dirname(os.path.abspath(source))
+    return [path if os.path.isabs(path) else os.path.join(base, path) for path in paths]
+
+
+def flip_file(source: str, output: str, vertical: bool = True,
+              transform: image.Transform | None = None) -> bool:
+    """Read image, reverse (or transform) it and write result.
+    Returns True on success.
+    """
+    try:
+        img = cv2.imread(source)
+        if img is None:
+            print(f"Cannot read {source}")
+            return False
+        if transform is not None:
+            return bool(cv2.imwrite(output, transform.apply(img)))
+        # Буфер после imread свой, разворачиваем его на месте: imwrite получает
+        # непрерывный массив и не делает лишнюю копию
+        return bool(cv2.imwrite(output, image.reverse_img_inplace(img, vertical)))
+    except Exception as e:
+        print(f"Cannot process {source}: {e}")
+        return False
+
+
+def output_paths(paths: list[str], out_dir: str) -> list[str]:
+    """Output path for every image: path relative to the common folder
+    of all inputs, so same-named files from different folders don't collide.
+    """
+    sources = [os.path.abspath(path) for path in paths]
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in sources])
+    except ValueError:
+        root = None  # Разные диски в Windows: общей папки нет
+
+    outputs, used = [], set()
+    for path in sources:
+        name = os.path.relpath(path, root) if root else os.path.basename(path)
+        output = os.path.join(out_dir, name)
+        # Совпасть могут повторы одного пути или имена с разных дисков: добавляем номер
+        stem, ext = os.path.splitext(output)
+        number = 1
+        while os.path.normcase(output) in used:
+            output = f"{stem}_{number}{ext}"
+            number += 1
+        used.add(os.path.normcase(output))
+        outputs.append(output)
+    return outputs
+
+
+def flip_batch(paths: list[str], out_dir: str, vertical: bool = True,
+               threads: int = 8,
+               transform: image.Transform | None = None) -> tuple[int, float]:
+    """Reverse all images into out_dir using thread pool.
+    OpenCV releases GIL in imread/imwrite, so threads run in parallel.
+    Returns number of written images and elapsed seconds.
+    """
+    outputs = output_paths(paths, out_dir)
+    for folder in {os.path.dirname(output) for output in outputs}:
+        os.makedirs(folder, exist_ok=True)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        results = list(executor.map(flip_file, paths, outputs,
+                                    [vertical] * len(paths),
+                                    [transform] * len(paths)))
+    elapsed = time.perf_counter() - start
+
+    return sum(results), elapsed
\ No newline at end of file
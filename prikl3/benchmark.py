@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+
+import image
+
+
+def get_args() -> argparse.Namespace:
+    """Parse cmd arguments"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--size', default='2000x3000', help='Size of random test image, HxW'
+    )
+    parser.add_argument(
+        '--transform', default='flipv,rot90,fliph,crop:100:100:2000:1500,rot180',
+        help='Transform spec to measure'
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=10, help='Number of runs per method'
+    )
+    return parser.parse_args()
+
+
+def measure(func, img: np.ndarray, repeat: int) -> float:
+    """Best time of func(img) in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(img)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Main function"""
+    args = get_args()
+    try:
+        height, width = (int(size) for size in args.size.lower().split('x'))
+        transform = image.Transform(args.transform)
+    except ValueError as e:
+        print(f"Something went wrong {e}")
+        return
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    fused = transform.apply(img)
+    sequential = transform.apply_sequential(img)
+    if fused.shape != sequential.shape or not np.array_equal(fused, sequential):
+        print("Fused and sequential results differ!")
+        return
+
+    fused_time = measure(transform.apply, img, args.repeat)
+    sequential_time = measure(transform.apply_sequential, img, args.repeat)
+    print(f"Transform '{args.transform}' on {width}x{height}, result {fused.shape[1]}x{fused.shape[0]}")
+    print(f"  sequential: {sequential_time * 1000:.1f} ms")
+    print(f"  fused:      {fused_time * 1000:.1f} ms  x{sequential_time / fused_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
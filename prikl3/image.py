@@ -1,3 +1,5 @@
+import shutil
+
 import matplotlib.pyplot as plt
 import numpy as np
 
@@ -7,6 +9,49 @@ def reverse_img(img: np.ndarray, vertical: bool = True) -> np.ndarray:
     return img[:, ::-1] if not vertical else img[::-1, :]
 
 
+def reverse_img_inplace(img: np.ndarray, vertical: bool = True,
+                        block_rows: int = 256) -> np.ndarray:
+    """Reverse image inside its own buffer.
+    Extra memory is limited to block_rows rows, so it also works for np.memmap.
+    """
+    height = img.shape[0]
+    if vertical:
+        # Меняем местами блоки строк сверху и снизу
+        half = height // 2
+        for start in range(0, half, block_rows):
+            end = min(start + block_rows, half)
+            top = img[start:end]
+            bottom = img[height - end:height - start][::-1]
+            buffer = top.copy()
+            top[...] = bottom
+            bottom[...] = buffer
+    else:
+        # Каждый блок строк разворачиваем по столбцам
+        for start in range(0, height, block_rows):
+            band = img[start:start + block_rows]
+            band[...] = band[:, ::-1].copy()
+    return img
+
+
+def reverse_raw(path: str, shape: tuple[int, ...], dtype: str = "uint8",
+                vertical: bool = True, output: str | None = None,
+                block_rows: int = 256) -> None:
+    """Reverse uncompressed raster file through np.memmap.
+    The file may be larger than RAM: only block_rows rows are in memory at once.
+    If output is given, the file is copied first and the copy is reversed.
+    """
+    if output and output != path:
+        shutil.copyfile(path, output)
+        path = output
+
+    raster = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+    try:
+        reverse_img_inplace(raster, vertical, block_rows)
+        raster.flush()
+    finally:
+        del raster
+
+
 def show(img: np.ndarray, rev_img: np.ndarray) -> None:
     """Show source and reversed image"""
 
@@ -16,4 +61,116 @@ def show(img: np.ndarray, rev_img: np.ndarray) -> None:
     axes[0].set_title("Source")
     axes[1].set_title("Result")
 
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+def index_slice(indices: np.ndarray) -> slice | None:
+    """Slice equal to index array, or None if step is not constant"""
+    if len(indices) == 1:
+        return slice(int(indices[0]), int(indices[0]) + 1)
+
+    step = int(indices[1] - indices[0])
+    if step == 0 or not np.all(np.diff(indices) == step):
+        return None
+    stop = int(indices[-1]) + step
+    return slice(int(indices[0]), stop if stop >= 0 else None, step)
+
+
+class Transform:
+    """Chain of flips, 90 degree rotations, crops and resizes.
+    All operations are composed into one index mapping and applied
+    to the image in a single pass.
+
+    Spec is a comma separated string, for example "flipv,rot90,crop:0:0:100:200":
+        flipv, fliph                  - vertical / horizontal reverse
+        rot90, rot180, rot270         - counterclockwise rotation
+        crop:top:left:height:width    - crop
+        resize:height:width           - nearest neighbour resize
+    """
+
+    def __init__(self, spec: str = "") -> None:
+        self.ops = self.parse(spec)
+
+    @staticmethod
+    def parse(spec: str) -> list[tuple[str, list[int]]]:
+        """Parse spec string into list of (operation, arguments)"""
+        arity = {"flipv": 0, "fliph": 0, "rot90": 0, "rot180": 0, "rot270": 0,
+                 "crop": 4, "resize": 2}
+        ops = []
+        for item in spec.split(","):
+            item = item.strip().lower()
+            if not item:
+                continue
+            name, *values = item.split(":")
+            if name not in arity or len(values) != arity[name]:
+                raise ValueError(f"Wrong transform: {item}")
+            ops.append((name, [int(value) for value in values]))
+        return ops
+
+    def compile(self, shape: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray, bool]:
+        """Compose operations for image of given shape.
+        Returns source indices for output rows and columns and
+        flag whether output rows go along source columns.
+        """
+        rows = np.arange(shape[0])
+        cols = np.arange(shape[1])
+        transposed = False
+
+        for name, values in self.ops:
+            if name == "flipv":
+                rows = rows[::-1]
+            elif name == "fliph":
+                cols = cols[::-1]
+            elif name in ("rot90", "rot180", "rot270"):
+                # Поворот на 90 против часовой = транспонирование + отражение строк
+                for _ in range(int(name[3:]) // 90):
+                    rows, cols = cols[::-1], rows
+                    transposed = not transposed
+            elif name == "crop":
+                top, left, height, width = values
+                if (top < 0 or left < 0 or height <= 0 or width <= 0
+                        or top + height > len(rows) or left + width > len(cols)):
+                    raise ValueError(f"Crop {values} is out of image {len(rows)}x{len(cols)}")
+                rows = rows[top:top + height]
+                cols = cols[left:left + width]
+            elif name == "resize":
+                height, width = values
+                if height <= 0 or width <= 0:
+                    raise ValueError(f"Wrong resize {values}")
+                rows = rows[np.arange(height) * len(rows) // height]
+                cols = cols[np.arange(width) * len(cols) // width]
+
+        return rows, cols, transposed
+
+    def apply(self, img: np.ndarray) -> np.ndarray:
+        """Apply all operations with one pass over the image"""
+        rows, cols, transposed = self.compile(img.shape)
+
+        # Без resize индексы - арифметические прогрессии: хватает среза и одной копии
+        row_slice, col_slice = index_slice(rows), index_slice(cols)
+        if row_slice is not None and col_slice is not None:
+            view = img.swapaxes(0, 1) if transposed else img
+            return np.ascontiguousarray(view[row_slice, col_slice])
+
+        if transposed:
+            return img[cols[np.newaxis, :], rows[:, np.newaxis]]
+        return img[rows[:, np.newaxis], cols[np.newaxis, :]]
+
+    def apply_sequential(self, img: np.ndarray) -> np.ndarray:
+        """Apply operations one by one, each into a new array (for comparison)"""
+        for name, values in self.ops:
+            if name == "flipv":
+                img = img[::-1]
+            elif name == "fliph":
+                img = img[:, ::-1]
+            elif name in ("rot90", "rot180", "rot270"):
+                img = np.rot90(img, int(name[3:]) // 90)
+            elif name == "crop":
+                top, left, height, width = values
+                img = img[top:top + height, left:left + width]
+            elif name == "resize":
+                height, width = values
+                img = img[np.arange(height) * img.shape[0] // height]
+                img = img[:, np.arange(width) * img.shape[1] // width]
+            img = np.ascontiguousarray(img)
+        return img
\ No newline at end of file
@@ -2,6 +2,7 @@ import argparse  # Импорт модуля для обработки аргу
 
 import cv2  # Импорт OpenCV для работы с изображениями
 
+import batch  # Импорт модуля пакетной обработки batch.py
 import image  # Импорт нашего собственного модуля image.py
 
 
@@ -17,27 +18,115 @@ def get_args() -> list[str]:
     parser.add_argument(
         '-v', '--is_vertical', help='Do vertical reverse need?'  # Добавление флага для вертикального отражения
     )
+    parser.add_argument(
+        '-b', '--batch', help='Folder or annotation CSV for batch mode'  # Пакетный режим: папка или CSV с путями
+    )
+    parser.add_argument(
+        '-t', '--threads', type=int, default=8, help='Number of threads in batch mode'  # Количество потоков
+    )
+    parser.add_argument(
+        '--inplace', action='store_true', help='Reverse inside the image buffer, no GUI'  # Отражение без второго массива
+    )
+    parser.add_argument(
+        '--raw_shape', help='Source is raw raster of this shape, e.g. 20000x30000x3'  # Сырой растр через np.memmap
+    )
+    parser.add_argument(
+        '--dtype', default='uint8', help='Pixel type of raw raster'  # Тип пикселя сырого растра
+    )
+    parser.add_argument(
+        '--transform', help='Transform spec instead of reverse, e.g. "flipv,rot90,crop:0:0:100:100"'  # Цепочка преобразований
+    )
     args = parser.parse_args()  # Парсинг аргументов из командной строки
-    if args.source is None or args.output is None:  # Проверка обязательных аргументов
+    if args.batch is not None and (args.source or args.raw_shape or args.inplace):  # Флаги, не используемые в пакетном режиме
+        parser.error('-b cannot be combined with -s, --raw_shape or --inplace '
+                     '(batch mode always reverses inside the image buffer)')
+    if args.raw_shape is not None and (args.transform or args.inplace):  # Сырой растр только отражается по блокам
+        parser.error('--raw_shape cannot be combined with --transform or --inplace')
+    if args.transform is not None and args.inplace:  # Цепочка преобразований создает новое изображение
+        parser.error('--transform cannot be combined with --inplace')
+    if (args.source is None and args.batch is None) or args.output is None:  # Проверка обязательных аргументов
         return None  # Возврат None, если обязательные аргументы не указаны
-    return [args.source, args.output, bool(args.is_vertical)]  # Возврат списка с аргументами
+    return [args.source, args.output, bool(args.is_vertical), args.batch, args.threads,
+            args.inplace, args.raw_shape, args.dtype, args.transform]  # Возврат списка с аргументами
+
+
+def run_raw(source: str, output: str, vertical: bool, raw_shape: str, dtype: str) -> None:
+    """Reverse raw raster file through memory map"""  # Отражение файла больше оперативной памяти
+    try:
+        shape = tuple(int(size) for size in raw_shape.lower().split('x'))  # Разбор строки вида ВxШxК
+        image.reverse_raw(source, shape, dtype, vertical, output)  # Отражение по блокам строк
+        print(f"Raw raster {raw_shape} reversed into {output}")  # Отчет
+    except Exception as e:  # Ошибка размера, типа или файла
+        print(f"Something went wrong {e}")  # Вывод сообщения об ошибке
+
+
+def run_batch(source: str, out_dir: str, vertical: bool, threads: int,
+              transform: image.Transform | None = None) -> None:
+    """Reverse all images from folder or CSV without GUI"""  # Пакетная обработка без окна matplotlib
+    try:
+        paths = batch.collect_images(source)  # Список путей из папки или CSV
+    except Exception as e:  # Ошибка чтения источника
+        print(f"Something went wrong {e}")  # Вывод сообщения об ошибке
+        return  # Завершение выполнения функции
+
+    if not paths:  # Нечего обрабатывать
+        print(f"No images found in {source}")  # Вывод сообщения
+        return  # Завершение выполнения функции
+
+    done, elapsed = batch.flip_batch(paths, out_dir, vertical, threads, transform)  # Отражение в пуле потоков
+    speed = done / elapsed if elapsed > 0 else 0.0  # Скорость обработки
+    print(f"Reversed {done}/{len(paths)} images in {elapsed:.2f} s ({speed:.1f} images/s)")  # Отчет
 
 
 def main() -> None:
     """Main function"""  # Документация главной функции
     try:
-        source, output, vertical = get_args()  # Получение аргументов из командной строки
-        img = cv2.imread(source)  # Загрузка изображения с помощью OpenCV
+        (source, output, vertical, batch_source, threads,
+         inplace, raw_shape, dtype, transform_spec) = get_args()  # Получение аргументов из командной строки
     except TypeError:  # Обработка исключения, если get_args() вернул None
-        print("Usage: python main.py -s source.jpg -o out.jpg")  # Вывод инструкции по использованию
+        print("Usage: python main.py -s source.jpg -o out.jpg\n"
+              "       python main.py -b images_dir_or.csv -o out_dir [-t threads]\n"
+              "       python main.py -s big.raw -o out.raw --raw_shape HxWxC [--dtype uint8]")  # Вывод инструкции по использованию
         return  # Завершение выполнения функции
+
+    transform = None  # Цепочка преобразований вместо простого отражения
+    if transform_spec:
+        try:
+            transform = image.Transform(transform_spec)  # Разбор строки преобразований
+        except ValueError as e:  # Неверная строка
+            print(f"Something went wrong {e}")  # Вывод сообщения об ошибке
+            return  # Завершение выполнения функции
+
+    if batch_source is not None:  # Пакетный режим
+        run_batch(batch_source, output, vertical, threads, transform)  # Обработка всех изображений, выход - папка
+        return  # Завершение выполнения функции
+
+    if raw_shape is not None:  # Сырой растр
+        run_raw(source, output, vertical, raw_shape, dtype)  # Отражение через np.memmap
+        return  # Завершение выполнения функции
+
+    try:
+        img = cv2.imread(source)  # Загрузка изображения с помощью OpenCV
     except Exception as e:  # Обработка любых других исключений
         print(f"Something went wrong {e}")  # Вывод сообщения об ошибке
         return  # Завершение выполнения функции
+    if img is None:  # imread не бросает исключение, а возвращает None
+        print(f"Cannot read {source}")  # Вывод сообщения об ошибке
+        return  # Завершение выполнения функции
 
     print(f"Image size: {img.shape[1]}*{img.shape[0]}")  # Вывод размера изображения (ширина*высота)
-    rev_img = image.reverse_img(img.copy(), vertical)  # Создание отраженной копии изображения (используется наш модуль image)
-    image.show(img, rev_img)  # Отображение исходного и отраженного изображений
+    if transform is not None:  # Все преобразования за один проход
+        try:
+            rev_img = transform.apply(img)  # Новое изображение после цепочки преобразований
+        except ValueError as e:  # Обрезка за пределами изображения
+            print(f"Something went wrong {e}")  # Вывод сообщения об ошибке
+            return  # Завершение выполнения функции
+        image.show(img, rev_img)  # Отображение исходного и полученного изображений
+    elif inplace:  # Отражение в том же буфере, исходника больше нет - окно не показываем
+        rev_img = image.reverse_img_inplace(img, vertical)  # Пиковая память - одно изображение
+    else:
+        rev_img = image.reverse_img(img, vertical)  # Отраженное представление изображения (срез, без копирования)
+        image.show(img, rev_img)  # Отображение исходного и отраженного изображений
 
     try:
         cv2.imwrite(output, rev_img)  # Сохранение отраженного изображения в файл
@@ -0,0 +1,133 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+import funcs
+
+
+def get_args() -> argparse.Namespace:
+    """Parsing console arguments"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-i",
+        "--images",
+        type=str,
+        default="images",
+        help="Path to folder with .jpg images",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=1,
+        help="How many times to process the image set per measurement",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=16,
+        help="Number of images sent to a worker at once",
+    )
+    parser.add_argument(
+        "--draft_size",
+        type=int,
+        default=128,
+        help="Target size for reduced-resolution decoding",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=200_000,
+        help="Number of random colors for vectorized vs scalar comparison",
+    )
+    return parser.parse_args()
+
+
+def measure_workers(paths: list[str], workers: int, batch_size: int,
+                    target_size: int = 0) -> float:
+    """Return throughput (images per second) for given number of workers"""
+    start = time.perf_counter()
+    funcs.get_dominant_colors(paths, workers, batch_size, target_size)
+    elapsed = time.perf_counter() - start
+    return len(paths) / elapsed if elapsed > 0 else 0.0
+
+
+def report_draft(paths: list[str], target_size: int) -> None:
+    """Compare full and reduced-resolution decoding: speed and color drift"""
+    exact_speed = measure_workers(paths, 1, 1)
+    draft_speed = measure_workers(paths, 1, 1, target_size)
+    drifts = [funcs.get_color_drift(path, target_size) for path in set(paths)]
+
+    print(f"Draft decoding (target {target_size}px):")
+    print(f"  full  {exact_speed:8.1f} img/s")
+    print(f"  draft {draft_speed:8.1f} img/s  x{draft_speed / exact_speed:.2f}")
+    print(f"  drift: max {max(drifts)}, mean {sum(drifts) / len(drifts):.2f} "
+          f"(channel units 0-255)")
+
+
+def report_vectorized(rows: int) -> None:
+    """Check that vectorized features equal scalar ones and compare speed"""
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, size=(rows, 3), dtype=np.uint8)
+    colors = rgb.tolist()
+
+    start = time.perf_counter()
+    scalar = (
+        [funcs.get_brightness_value(color) for color in colors],
+        [funcs.get_brightness_range(color) for color in colors],
+        [funcs.get_color_category(color) for color in colors],
+    )
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector = (
+        funcs.get_brightness_values(rgb).tolist(),
+        funcs.get_brightness_ranges(rgb).tolist(),
+        funcs.get_color_categories(rgb).tolist(),
+    )
+    vector_time = time.perf_counter() - start
+
+    print(f"Vectorized features ({rows} rows):")
+    print(f"  scalar {scalar_time:.3f} s, vectorized {vector_time:.3f} s "
+          f"x{scalar_time / vector_time:.1f}")
+
+    names = ("brightness", "range", "category")
+    for name, expected, actual in zip(names, scalar, vector):
+        mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+        print(f"  {name}: {mismatches} mismatches")
+
+
+def main() -> None:
+    """Main function"""
+    args = get_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+    if not paths:
+        print(f"No images found in {args.images}")
+        return
+    paths = paths * max(1, args.repeat)
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cores})
+
+    print(f"Images: {len(paths)}, cores: {cores}")
+    baseline = None
+    for workers in counts:
+        speed = measure_workers(paths, workers, args.batch_size)
+        if baseline is None:
+            baseline = speed
+        ratio = speed / baseline if baseline else 0.0
+        print(f"  workers={workers:<3} {speed:8.1f} img/s  x{ratio:.2f}")
+
+    if args.draft_size > 0:
+        report_draft(paths, args.draft_size)
+
+    if args.rows > 0:
+        report_vectorized(args.rows)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+
+class FeatureCache:
+    """On-disk SQLite cache of dominant colors.
+    Entry is valid while file path, mtime and size are unchanged
+    (or, with use_hash, while file content hash is the same).
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 1_000_000,
+                 use_hash: bool = False, rebuild: bool = False) -> None:
+        """Open (or create) cache database"""
+        self.max_entries = max_entries
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(db_path)
+        if rebuild:
+            self.connection.execute("DROP TABLE IF EXISTS features")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS features (
+                   path TEXT NOT NULL,
+                   target_size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   size INTEGER NOT NULL,
+                   digest TEXT,
+                   r INTEGER NOT NULL,
+                   g INTEGER NOT NULL,
+                   b INTEGER NOT NULL,
+                   used REAL NOT NULL,
+                   PRIMARY KEY (path, target_size)
+               )"""
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS features_digest ON features (digest)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS features_used ON features (used)")
+        self.connection.commit()
+
+    def file_digest(self, image_path: str) -> str:
+        """SHA-1 of file content"""
+        digest = hashlib.sha1()
+        with open(image_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def digest(self, image_path: str) -> str | None:
+        """Content hash used as the cache key (None without use_hash
+        or if the file cannot be read). Can be passed to lookup and store
+        so the file is hashed only once.
+        """
+        if not self.use_hash:
+            return None
+        try:
+            return self.file_digest(image_path)
+        except OSError:
+            return None
+
+    def lookup(self, image_path: str, target_size: int = 0,
+               digest: str | None = None) -> list[int] | None:
+        """Return cached color or None if there is no valid entry"""
+        try:
+            stat = os.stat(image_path)
+            if self.use_hash:
+                row = self.connection.execute(
+                    "SELECT rowid, r, g, b FROM features "
+                    "WHERE digest = ? AND target_size = ? LIMIT 1",
+                    (digest or self.file_digest(image_path), target_size),
+                ).fetchone()
+            else:
+                row = self.connection.execute(
+                    "SELECT rowid, r, g, b FROM features "
+                    "WHERE path = ? AND target_size = ? "
+                    "AND mtime_ns = ? AND size = ?",
+                    (image_path, target_size, stat.st_mtime_ns, stat.st_size),
+                ).fetchone()
+        except OSError:
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.connection.execute("UPDATE features SET used = ? WHERE rowid = ?",
+                                (time.time(), row[0]))
+        return [row[1], row[2], row[3]]
+
+    def store(self, image_path: str, color: list[int], target_size: int = 0,
+              digest: str | None = None) -> None:
+        """Save color of the image"""
+        try:
+            stat = os.stat(image_path)
+            if self.use_hash and digest is None:
+                digest = self.file_digest(image_path)
+        except OSError:
+            return
+
+        self.connection.execute(
+            "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (image_path, target_size, stat.st_mtime_ns, stat.st_size, digest,
+             color[0], color[1], color[2], time.time()),
+        )
+
+    def evict(self) -> int:
+        """Remove least recently used entries above max_entries"""
+        count = self.connection.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        extra = count - self.max_entries
+        if extra <= 0:
+            return 0
+
+        self.connection.execute(
+            "DELETE FROM features WHERE rowid IN "
+            "(SELECT rowid FROM features ORDER BY used LIMIT ?)",
+            (extra,),
+        )
+        return extra
+
+    def close(self) -> None:
+        """Evict old entries, commit changes and close database"""
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
\ No newline at end of file
@@ -1,28 +1,107 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from matplotlib.figure import Figure
 from PIL import Image
 import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
+from cache import FeatureCache
+from histogram import ColorHistogram
 
-def get_dominant_color(image_path: str) -> list[int]:
-    """Calculate dominant color as average of every channel"""
+COLOR_COLUMNS = ['dominant_r', 'dominant_g', 'dominant_b']
+BRIGHTNESS_RANGES = np.array([f"{start}-{start + 49}" for start in range(0, 300, 50)],
+                             dtype=object)
+
+
+def get_dominant_color(image_path: str, target_size: int = 0) -> list[int]:
+    """Calculate dominant color as average of every channel.
+    If target_size > 0 the image is decoded at reduced resolution
+    (JPEG DCT scaling + thumbnail) so its longest side is about target_size.
+    Returns [0, 0, 0] if the image cannot be read.
+    """
+    color = read_dominant_color(image_path, target_size)
+    return color if color is not None else [0, 0, 0]
+
+
+def read_dominant_color(image_path: str, target_size: int = 0) -> list[int] | None:
+    """Same as get_dominant_color, but returns None if the image cannot be read"""
     try:
         if not os.path.exists(image_path):
             print(f"Warning: File {image_path} not found")
-            return [0, 0, 0]
+            return None
 
         with Image.open(image_path) as img:
+            if target_size > 0:
+                # draft() уменьшает JPEG прямо при декодировании (1/2, 1/4, 1/8),
+                # thumbnail() дожимает до нужного размера и работает для любых форматов
+                img.draft('RGB', (target_size, target_size))
+                img.thumbnail((target_size, target_size), Image.BOX)
             img = img.convert('RGB')
-            pixels = np.array(img)
-            r_mean = pixels[:, :, 0].mean()
-            g_mean = pixels[:, :, 1].mean()
-            b_mean = pixels[:, :, 2].mean()
+            pixels = np.asarray(img).reshape(-1, 3)
 
-        return [int(r_mean), int(g_mean), int(b_mean)]
+        # Одна редукция по всем трём каналам сразу, в целых числах без потерь
+        sums = pixels.sum(axis=0, dtype=np.uint64)
+        means = sums // max(1, len(pixels))
+        return [int(value) for value in means]
     except Exception as e:
         print(f"Error processing {image_path}: {e}")
-        return [0, 0, 0]
+        return None
+
+
+def get_color_drift(image_path: str, target_size: int) -> int:
+    """Max channel difference between exact and reduced-resolution dominant color"""
+    exact = get_dominant_color(image_path)
+    approx = get_dominant_color(image_path, target_size)
+    return max(abs(a - b) for a, b in zip(exact, approx))
+
+
+def get_dominant_colors(image_paths: list[str], workers: int = 1,
+                        batch_size: int = 16, target_size: int = 0,
+                        cache: FeatureCache | None = None,
+                        executor: Executor | None = None) -> list[list[int]]:
+    """Calculate dominant colors of many images in a process pool.
+    Results are returned in the same order as image_paths.
+    workers <= 0 means all available cores.
+    If executor is given it is used instead of a new pool (workers is ignored).
+    Colors found in cache are not recalculated, new ones are stored there
+    (images that failed to decode are not cached and get [0, 0, 0]).
+    """
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    colors = [None] * len(image_paths)
+    digests = [None] * len(image_paths)
+    if cache is not None:
+        for i, path in enumerate(image_paths):
+            # Хэш файла считаем один раз: он нужен и для поиска, и для записи
+            digests[i] = cache.digest(path)
+            colors[i] = cache.lookup(path, target_size, digests[i])
+    missing = [i for i, color in enumerate(colors) if color is None]
+    missing_paths = [image_paths[i] for i in missing]
+
+    worker = partial(read_dominant_color, target_size=target_size)
+    if executor is not None and len(missing_paths) > 1:
+        results = list(executor.map(worker, missing_paths,
+                                    chunksize=max(1, batch_size)))
+    elif workers == 1 or len(missing_paths) <= 1:
+        results = [worker(path) for path in missing_paths]
+    else:
+        # executor.map отдаёт результаты по порядку, пачками по batch_size путей
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(worker, missing_paths,
+                                        chunksize=max(1, batch_size)))
+
+    for i, color in zip(missing, results):
+        if color is None:
+            colors[i] = [0, 0, 0]  # Ошибку чтения в кэш не записываем
+            continue
+        colors[i] = color
+        if cache is not None:
+            cache.store(image_paths[i], color, target_size, digests[i])
+
+    return colors
 
 
 def get_brightness_value(rgb: list[int]) -> float:
@@ -76,6 +155,66 @@ def get_color_category(rgb: list[int]) -> str:
         return "Mixed Colors"
 
 
+def colors_to_array(colors: list[list[int]]) -> np.ndarray:
+    """Convert list of [r, g, b] into Nx3 uint8 array"""
+    if not colors:
+        return np.zeros((0, 3), dtype=np.uint8)
+    return np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+def add_color_columns(df: pd.DataFrame, rgb: np.ndarray) -> None:
+    """Store Nx3 colors as three uint8 columns of DataFrame"""
+    for i, column in enumerate(COLOR_COLUMNS):
+        df[column] = rgb[:, i]
+
+
+def get_brightness_values(rgb: np.ndarray) -> np.ndarray:
+    """Vectorized get_brightness_value for Nx3 array"""
+    rgb = rgb.astype(np.float64)
+    return 0.299 * rgb[:, 0] + 0.587 * rgb[:, 1] + 0.114 * rgb[:, 2]
+
+
+def get_brightness_ranges(rgb: np.ndarray) -> np.ndarray:
+    """Vectorized get_brightness_range for Nx3 array"""
+    index = np.floor_divide(get_brightness_values(rgb), 50).astype(np.int64)
+    index = np.clip(index, 0, len(BRIGHTNESS_RANGES) - 1)
+    return BRIGHTNESS_RANGES[index]
+
+
+def get_color_categories(rgb: np.ndarray) -> np.ndarray:
+    """Vectorized get_color_category for Nx3 array"""
+    # int16, чтобы r - g и g + 20 не переполняли uint8
+    rgb = rgb.astype(np.int16)
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    max_value = rgb.max(axis=1)
+    gray = (np.abs(r - g) < 30) & (np.abs(g - b) < 30)
+
+    # Условия в том же порядке, что и ветки get_color_category
+    conditions = [
+        (max_value == r) & (r > g + 20) & (r > b + 20),
+        (max_value == g) & (g > r + 20) & (g > b + 20),
+        (max_value == b) & (b > r + 20) & (b > g + 20),
+        (r > 200) & (g > 200) & (b < 100),
+        (r > 200) & (b > 200) & (g < 100),
+        (r > 180) & (g > 100) & (g < 150) & (b < 100),
+        gray & (max_value > 200),
+        gray & (max_value < 80),
+        gray,
+    ]
+    choices = [
+        "Red Dominant",
+        "Green Dominant",
+        "Blue Dominant",
+        "Yellow/Orange",
+        "Purple/Violet",
+        "Orange/Warm",
+        "White/Gray",
+        "Black/Dark Gray",
+        "Gray",
+    ]
+    return np.select(conditions, choices, default="Mixed Colors").astype(object)
+
+
 def sort_by_column(df: pd.DataFrame, column: str) -> pd.DataFrame:
     """Sorting DataFrame by column"""
     return df.sort_values(by=column)
@@ -86,92 +225,84 @@ def filter_by_range(df: pd.DataFrame, range_str: str) -> pd.DataFrame:
     return df[df['brightness_range'] == range_str]
 
 
-def show_and_save(df_sort: pd.DataFrame) -> None:
-    """Show and save histograms of dominant color distribution"""
+def add_features(df: pd.DataFrame, workers: int = 1, batch_size: int = 16,
+                 target_size: int = 0,
+                 cache: FeatureCache | None = None,
+                 executor: Executor | None = None) -> np.ndarray:
+    """Add color, brightness, range and category columns to DataFrame.
+    Returns Nx3 array of dominant colors.
+    """
+    rgb = colors_to_array(get_dominant_colors(
+        df["Relative Path"].tolist(), workers, batch_size, target_size, cache,
+        executor))
+    add_color_columns(df, rgb)
+    df['brightness_value'] = get_brightness_values(rgb)
+    df['brightness_range'] = get_brightness_ranges(rgb)
+    df['color_category'] = get_color_categories(rgb)
+    return rgb
 
-    if df_sort.empty:
-        print("No data to display")
-        return
 
-    # Создаём фигуру с 4 графиками (3 для цветов + 1 общий)
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+def build_histogram(df: pd.DataFrame, rgb: np.ndarray) -> ColorHistogram:
+    """Histogram of DataFrame with columns from add_features"""
+    histogram = ColorHistogram()
+    histogram.add(rgb, df['color_category'], df['brightness_value'].to_numpy())
+    return histogram
 
-    # ============================================
-    # 1. Извлекаем значения R, G, B
-    # ============================================
 
-    red_values = []
-    green_values = []
-    blue_values = []
+def use_headless_backend() -> None:
+    """Switch pyplot to non-interactive Agg backend"""
+    plt.switch_backend('Agg')
 
-    for color_list in df_sort['dominant_color']:
-        if isinstance(color_list, list) and len(color_list) >= 3:
-            red_values.append(color_list[0])
-            green_values.append(color_list[1])
-            blue_values.append(color_list[2])
 
-    # Настройки для гистограмм
-    bins = 20
-    alpha = 0.7
+def new_figure(figsize: tuple[int, int], interactive: bool) -> Figure:
+    """Create pyplot figure (can be shown) or standalone Agg figure"""
+    if interactive:
+        return plt.figure(figsize=figsize)
+    return Figure(figsize=figsize)
 
-    # ============================================
-    # 2. ГИСТОГРАММА КРАСНОГО КАНАЛА
-    # ============================================
-    axes[0, 0].hist(red_values, bins=bins, color='red', alpha=alpha,
-                    edgecolor='black', density=False)
-    axes[0, 0].set_xlabel('Red Channel Value (0-255)')
-    axes[0, 0].set_ylabel('Number of Images')
-    axes[0, 0].set_title('Red Channel Distribution')
-    axes[0, 0].grid(True, alpha=0.3)
-
-    if red_values:
-        mean_red = sum(red_values) / len(red_values)
-        axes[0, 0].axvline(mean_red, color='darkred', linestyle='--',
-                           linewidth=2, label=f'Mean: {mean_red:.1f}')
-        axes[0, 0].legend()
+
+def draw_color_histogram(fig: Figure, histogram: ColorHistogram,
+                         bins: int = 32) -> None:
+    """Draw histograms of dominant color distribution on figure.
+    Charts are drawn from precomputed counts, so drawing time
+    does not depend on the number of images.
+    """
+    # Создаём 4 графика (3 для цветов + 1 общий)
+    axes = fig.subplots(2, 2)
 
     # ============================================
-    # 3. ГИСТОГРАММА ЗЕЛЁНОГО КАНАЛА
+    # 1. Счётчики по корзинам для каждого канала
     # ============================================
-    axes[0, 1].hist(green_values, bins=bins, color='green', alpha=alpha,
-                    edgecolor='black', density=False)
-    axes[0, 1].set_xlabel('Green Channel Value (0-255)')
-    axes[0, 1].set_ylabel('Number of Images')
-    axes[0, 1].set_title('Green Channel Distribution')
-    axes[0, 1].grid(True, alpha=0.3)
-
-    if green_values:
-        mean_green = sum(green_values) / len(green_values)
-        axes[0, 1].axvline(mean_green, color='darkgreen', linestyle='--',
-                           linewidth=2, label=f'Mean: {mean_green:.1f}')
-        axes[0, 1].legend()
+    edges, counts = histogram.binned(bins)
+    means = histogram.channel_means()
+    alpha = 0.7
 
     # ============================================
-    # 4. ГИСТОГРАММА СИНЕГО КАНАЛА
+    # 2-4. ГИСТОГРАММЫ КРАСНОГО, ЗЕЛЁНОГО И СИНЕГО КАНАЛОВ
     # ============================================
-    axes[1, 0].hist(blue_values, bins=bins, color='blue', alpha=alpha,
-                    edgecolor='black', density=False)
-    axes[1, 0].set_xlabel('Blue Channel Value (0-255)')
-    axes[1, 0].set_ylabel('Number of Images')
-    axes[1, 0].set_title('Blue Channel Distribution')
-    axes[1, 0].grid(True, alpha=0.3)
-
-    if blue_values:
-        mean_blue = sum(blue_values) / len(blue_values)
-        axes[1, 0].axvline(mean_blue, color='darkblue', linestyle='--',
-                           linewidth=2, label=f'Mean: {mean_blue:.1f}')
-        axes[1, 0].legend()
+    channels = [
+        (axes[0, 0], 'Red', 'red', 'darkred'),
+        (axes[0, 1], 'Green', 'green', 'darkgreen'),
+        (axes[1, 0], 'Blue', 'blue', 'darkblue'),
+    ]
+    for i, (ax, name, color, dark_color) in enumerate(channels):
+        ax.stairs(counts[i], edges, fill=True, color=color, alpha=alpha)
+        ax.stairs(counts[i], edges, color='black', linewidth=0.8)
+        ax.set_xlabel(f'{name} Channel Value (0-255)')
+        ax.set_ylabel('Number of Images')
+        ax.set_title(f'{name} Channel Distribution')
+        ax.grid(True, alpha=0.3)
+        ax.axvline(means[i], color=dark_color, linestyle='--',
+                   linewidth=2, label=f'Mean: {means[i]:.1f}')
+        ax.legend()
 
     # ============================================
     # 5. СОВМЕЩЁННАЯ ГИСТОГРАММА ВСЕХ КАНАЛОВ
     # ============================================
-    axes[1, 1].hist([red_values, green_values, blue_values],
-                    bins=bins,
-                    color=['red', 'green', 'blue'],
-                    alpha=0.6,
-                    edgecolor='black',
-                    label=['Red', 'Green', 'Blue'],
-                    density=False)
+    for i, (_, name, color, _) in enumerate(channels):
+        axes[1, 1].stairs(counts[i], edges, fill=True, color=color,
+                          alpha=0.3, label=name)
+        axes[1, 1].stairs(counts[i], edges, color=color, linewidth=1.5)
 
     axes[1, 1].set_xlabel('Channel Value (0-255)')
     axes[1, 1].set_ylabel('Number of Images')
@@ -179,24 +310,15 @@ def show_and_save(df_sort: pd.DataFrame) -> None:
     axes[1, 1].grid(True, alpha=0.3)
     axes[1, 1].legend()
 
-    # ============================================
-    # 6. НАСТРОЙКА И СОХРАНЕНИЕ
-    # ============================================
-    plt.suptitle('Dominant Color Distribution Analysis', fontsize=16, fontweight='bold')
-    plt.tight_layout()
+    fig.suptitle('Dominant Color Distribution Analysis', fontsize=16, fontweight='bold')
+    fig.tight_layout()
 
-    try:
-        plt.savefig("dominant_color_histogram.png", dpi=150, bbox_inches='tight')
-        print("Histogram saved as: dominant_color_histogram.png")
-    except Exception as e:
-        print(f"Cannot save histogram: {e}")
 
-    # ============================================
-    # 7. ДОПОЛНИТЕЛЬНАЯ ГИСТОГРАММА: ЦВЕТОВЫЕ КАТЕГОРИИ
-    # ============================================
-    plt.figure(figsize=(12, 6))
+def draw_categories(fig: Figure, histogram: ColorHistogram) -> None:
+    """Draw bar chart of color categories on figure"""
+    ax = fig.subplots()
 
-    color_counts = df_sort['color_category'].value_counts()
+    color_counts = pd.Series(dict(histogram.category_counts.most_common()))
 
     # Раскрашиваем столбцы в соответствующие цвета
     colors = []
@@ -217,26 +339,85 @@ def show_and_save(df_sort: pd.DataFrame) -> None:
     for category in color_counts.index:
         colors.append(color_map.get(category, 'gray'))
 
-    bars = plt.bar(color_counts.index, color_counts.values,
-                   color=colors, edgecolor='black', alpha=0.8)
+    bars = ax.bar(color_counts.index, color_counts.values,
+                  color=colors, edgecolor='black', alpha=0.8)
 
-    plt.xlabel('Color Category')
-    plt.ylabel('Number of Images')
-    plt.title('Distribution by Color Categories')
-    plt.xticks(rotation=45, ha='right')
+    ax.set_xlabel('Color Category')
+    ax.set_ylabel('Number of Images')
+    ax.set_title('Distribution by Color Categories')
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
 
     # Добавляем значения над столбцами
     for bar in bars:
         height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width() / 2., height + 0.1,
-                 f'{int(height)}', ha='center', va='bottom')
+        ax.text(bar.get_x() + bar.get_width() / 2., height + 0.1,
+                f'{int(height)}', ha='center', va='bottom')
+
+    fig.tight_layout()
 
-    plt.tight_layout()
 
+def save_figure(fig: Figure, path: str, title: str) -> str | None:
+    """Save figure to path, return path or None on error"""
     try:
-        plt.savefig("color_categories.png", dpi=150, bbox_inches='tight')
-        print("Color categories chart saved as: color_categories.png")
+        fig.savefig(path, dpi=150, bbox_inches='tight')
+        print(f"{title} saved as: {path}")
+        return path
     except Exception as e:
-        print(f"Cannot save color categories chart: {e}")
+        print(f"Cannot save {title.lower()}: {e}")
+        return None
+
+
+def render_reports(histogram: ColorHistogram, out_dir: str = ".",
+                   fmt: str = "png", bins: int = 32,
+                   interactive: bool = False) -> list[str]:
+    """Draw and save both charts, return paths of saved files.
+    Without interactive standalone Figure objects are used (no pyplot state),
+    so this can run in a background thread.
+    """
+    if histogram.total == 0:
+        print("No data to display")
+        return []
+
+    os.makedirs(out_dir, exist_ok=True)
+    reports = [
+        ((14, 10), partial(draw_color_histogram, bins=bins),
+         "dominant_color_histogram", "Histogram"),
+        ((12, 6), draw_categories, "color_categories", "Color categories chart"),
+    ]
+
+    saved = []
+    for figsize, draw, name, title in reports:
+        fig = new_figure(figsize, interactive)
+        draw(fig, histogram)
+        path = save_figure(fig, os.path.join(out_dir, f"{name}.{fmt}"), title)
+        if path:
+            saved.append(path)
+        if not interactive:
+            # Отдельная Figure не попадает в pyplot, достаточно убрать оси
+            fig.clear()
+
+    return saved
+
+
+def render_in_background(histogram: ColorHistogram, out_dir: str = ".",
+                         fmt: str = "png", bins: int = 32) -> Future:
+    """Start headless rendering in a background thread"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(render_reports, histogram, out_dir, fmt, bins)
+    executor.shutdown(wait=False)
+    return future
+
+
+def show_and_save(histogram: ColorHistogram, out_dir: str = ".",
+                  fmt: str = "png", bins: int = 32) -> None:
+    """Show and save histograms of dominant color distribution"""
+    if histogram.total == 0:
+        print("No data to display")
+        return
+
+    render_reports(histogram, out_dir, fmt, bins, interactive=True)
 
-    plt.show()
\ No newline at end of file
+    plt.show()
+    plt.close('all')
\ No newline at end of file
@@ -0,0 +1,60 @@
+from collections import Counter
+from typing import Iterable
+
+import numpy as np
+
+
+class ColorHistogram:
+    """Accumulator of dominant color statistics.
+    Keeps 256-bin counts per channel, category counts and brightness sum,
+    so memory does not depend on the number of images.
+    Histograms of separate chunks (or workers) can be merged.
+    """
+
+    def __init__(self) -> None:
+        self.channel_counts = np.zeros((3, 256), dtype=np.int64)
+        self.category_counts = Counter()
+        self.brightness_sum = 0.0
+
+    @property
+    def total(self) -> int:
+        """Number of accumulated images"""
+        return int(self.channel_counts[0].sum())
+
+    def add(self, rgb: np.ndarray, categories: Iterable[str],
+            brightness: np.ndarray) -> None:
+        """Add Nx3 uint8 colors with their categories and brightness"""
+        for i in range(3):
+            self.channel_counts[i] += np.bincount(rgb[:, i], minlength=256)
+        names, counts = np.unique(np.asarray(categories, dtype=object),
+                                  return_counts=True)
+        self.category_counts.update(dict(zip(names, counts.tolist())))
+        self.brightness_sum += float(np.sum(brightness))
+
+    def merge(self, other: "ColorHistogram") -> "ColorHistogram":
+        """Add counts of other histogram to this one"""
+        self.channel_counts += other.channel_counts
+        self.category_counts.update(other.category_counts)
+        self.brightness_sum += other.brightness_sum
+        return self
+
+    def __iadd__(self, other: "ColorHistogram") -> "ColorHistogram":
+        return self.merge(other)
+
+    def channel_means(self) -> np.ndarray:
+        """Average value of every channel"""
+        if self.total == 0:
+            return np.zeros(3)
+        return (self.channel_counts * np.arange(256)).sum(axis=1) / self.total
+
+    def brightness_mean(self) -> float:
+        """Average brightness"""
+        return self.brightness_sum / self.total if self.total else 0.0
+
+    def binned(self, bins: int = 32) -> tuple[np.ndarray, np.ndarray]:
+        """Return bin edges and 3 x bins counts (bins must divide 256)"""
+        if 256 % bins:
+            raise ValueError(f"Number of bins must divide 256, got {bins}")
+        counts = self.channel_counts.reshape(3, bins, 256 // bins).sum(axis=2)
+        edges = np.linspace(0, 256, bins + 1)
+        return edges, counts
\ No newline at end of file
@@ -1,9 +1,14 @@
 import argparse
+from concurrent.futures import Future
+
 import pandas as pd
 import funcs
+import stream
+from cache import FeatureCache
+from histogram import ColorHistogram
 
 
-def get_args() -> list[str]:
+def get_args() -> argparse.Namespace | None:
     """Parsing console arguments
     Returns None if there are no arguments.
     """
@@ -20,11 +25,116 @@ def get_args() -> list[str]:
         type=str,
         help="Path to out_file.csv",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes (0 - all cores)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=16,
+        help="Number of images sent to a worker at once",
+    )
+    parser.add_argument(
+        "--draft_size",
+        type=int,
+        default=0,
+        help="Decode images at reduced size (longest side in px, 0 - full size)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        help="Path to SQLite cache of image features",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=1_000_000,
+        help="Max number of cached images (least recently used are evicted)",
+    )
+    parser.add_argument(
+        "--cache_hash",
+        action="store_true",
+        help="Validate cache entries by file content hash",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="Drop cache and calculate everything again",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=0,
+        help="Process annotation by chunks of this many rows (0 - all at once)",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Do not show charts, render them in background while CSV is saved",
+    )
+    parser.add_argument(
+        "--plots_dir",
+        type=str,
+        default=".",
+        help="Folder for saved charts",
+    )
+    parser.add_argument(
+        "--plot_format",
+        type=str,
+        default="png",
+        help="Format of saved charts (png, svg, pdf, ...)",
+    )
     args = parser.parse_args()
 
     if args.file is None or args.out_file is None:
         return None
-    return [args.file, args.out_file]
+    return args
+
+
+def print_statistics(histogram: ColorHistogram) -> None:
+    """Print average color, brightness and categories distribution"""
+    total = histogram.total
+    if total == 0:
+        print("No images processed")
+        return
+
+    red, green, blue = histogram.channel_means()
+
+    print("\n=== COLOR ANALYSIS STATISTICS ===")
+    print(f"Total images: {total}")
+    print(f"Average color: R={red:.1f}, G={green:.1f}, B={blue:.1f}")
+    print(f"Average brightness: {histogram.brightness_mean():.1f}")
+
+    # Распределение по категориям
+    print("\nColor categories distribution:")
+    for category, count in histogram.category_counts.most_common():
+        percentage = (count / total) * 100
+        print(f"  {category}: {count} images ({percentage:.1f}%)")
+
+
+def start_reports(histogram: ColorHistogram,
+                  args: argparse.Namespace) -> Future | None:
+    """Render charts: in background if headless, otherwise show them"""
+    print("Generating histograms...")
+    if args.headless:
+        return funcs.render_in_background(histogram, args.plots_dir, args.plot_format)
+
+    funcs.show_and_save(histogram, args.plots_dir, args.plot_format)
+    return None
+
+
+def wait_reports(rendering: Future | None) -> None:
+    """Wait for background rendering to finish"""
+    if rendering is None:
+        return
+    try:
+        rendering.result()
+    except Exception as e:
+        print(f"Cannot render charts: {e}")
 
 
 def main() -> None:
@@ -32,10 +142,46 @@ def main() -> None:
 
     args = get_args()
     if args is None:
-        print("Usage: python main.py -c file.csv -o out_file.csv")
+        print("Usage: python main.py -c file.csv -o out_file.csv [-w workers]")
         return
 
-    csv, out = args
+    csv, out = args.file, args.out_file
+    workers, batch_size, draft_size = args.workers, args.batch_size, args.draft_size
+    chunksize = args.chunksize
+
+    if args.headless:
+        funcs.use_headless_backend()
+
+    cache = None
+    if args.cache:
+        try:
+            cache = FeatureCache(args.cache, args.cache_size, args.cache_hash,
+                                 args.rebuild_cache)
+        except Exception as e:
+            print(f"Warning: cache {args.cache} is not available: {e}")
+
+    if chunksize > 0:
+        # Потоковый режим: чанки, внешняя сортировка слиянием
+        print(f"Processing {csv} by chunks of {chunksize} rows...")
+        try:
+            histogram = stream.process_in_chunks(
+                csv, out, chunksize, workers, batch_size, draft_size, cache)
+            if histogram.total:
+                print(f"Results saved to {out}")
+            else:
+                print(f"No rows in {csv}, {out} was not written")
+        except Exception as e:
+            print(f"Error: Cannot process {csv}: {e}")
+            return
+        finally:
+            if cache is not None:
+                print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
+
+        rendering = start_reports(histogram, args)
+        print_statistics(histogram)
+        wait_reports(rendering)
+        return
 
     try:
         df = pd.read_csv(csv)
@@ -44,48 +190,35 @@ def main() -> None:
         print(f"Error: Cannot read {csv}: {e}")
         return
 
-    # 1. Добавляем колонку с доминирующим цветом
+    # 1-4. Добавляем колонки с цветом (R, G, B как uint8), яркостью,
+    # диапазоном яркости и цветовой категорией
     print("Calculating dominant colors...")
-    df['dominant_color'] = df["Relative Path"].apply(funcs.get_dominant_color)
-
-    # 2. Добавляем колонку с яркостью
-    print("Calculating brightness...")
-    df['brightness_value'] = df['dominant_color'].apply(funcs.get_brightness_value)
-
-    # 3. Добавляем колонку с диапазоном яркости
-    df['brightness_range'] = df['dominant_color'].apply(funcs.get_brightness_range)
-
-    # 4. Добавляем колонку с цветовой категорией (опционально)
-    df['color_category'] = df['dominant_color'].apply(funcs.get_color_category)
+    try:
+        rgb = funcs.add_features(df, workers, batch_size, draft_size, cache)
+    finally:
+        if cache is not None:
+            print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+            cache.close()
 
     # 5. Сортируем по яркости
     df_sort = funcs.sort_by_column(df, "brightness_value")
 
-    # 6. Показываем и сохраняем гистограммы
-    print("Generating histograms...")
-    funcs.show_and_save(df_sort)
+    # 6. Показываем и сохраняем гистограммы (в фоне, если headless)
+    histogram = funcs.build_histogram(df, rgb)
+    rendering = start_reports(histogram, args)
 
     # 7. Сохраняем результаты
     try:
         df_sort.to_csv(out, index=False)
         print(f"Results saved to {out}")
-
-        # Выводим статистику
-        print("\n=== COLOR ANALYSIS STATISTICS ===")
-        print(f"Total images: {len(df)}")
-        print(f"Average color: R={df['dominant_color'].apply(lambda x: x[0]).mean():.1f}, "
-              f"G={df['dominant_color'].apply(lambda x: x[1]).mean():.1f}, "
-              f"B={df['dominant_color'].apply(lambda x: x[2]).mean():.1f}")
-        print(f"Average brightness: {df['brightness_value'].mean():.1f}")
-
-        # Распределение по категориям
-        print("\nColor categories distribution:")
-        for category, count in df['color_category'].value_counts().items():
-            percentage = (count / len(df)) * 100
-            print(f"  {category}: {count} images ({percentage:.1f}%)")
-
     except Exception as e:
         print(f"Cannot save dataframe: {e}")
+        wait_reports(rendering)
+        return
+
+    # Выводим статистику
+    print_statistics(histogram)
+    wait_reports(rendering)
 
 
 if __name__ == "__main__":
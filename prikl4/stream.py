@@ -0,0 +1,102 @@
+import csv
+import heapq
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import pandas as pd
+
+import funcs
+from cache import FeatureCache
+from histogram import ColorHistogram
+
+
+def write_sorted_run(df: pd.DataFrame, run_dir: str, column: str) -> str:
+    """Sort chunk by column and save it as a separate CSV run"""
+    fd, run_path = tempfile.mkstemp(suffix=".csv", dir=run_dir)
+    os.close(fd)
+    df.sort_values(by=column, kind="mergesort").to_csv(run_path, index=False)
+    return run_path
+
+
+def merge_runs(run_paths: list[str], out: str, column: str,
+               fan_in: int = 64) -> None:
+    """External merge sort: merge sorted CSV runs into out file by column.
+    No more than fan_in files are open at once.
+    """
+    run_dir = os.path.dirname(run_paths[0])
+
+    # Если файлов слишком много, сливаем их по группам в несколько проходов
+    while len(run_paths) > fan_in:
+        merged = []
+        for i in range(0, len(run_paths), fan_in):
+            fd, merged_path = tempfile.mkstemp(suffix=".csv", dir=run_dir)
+            os.close(fd)
+            merge_group(run_paths[i:i + fan_in], merged_path, column)
+            merged.append(merged_path)
+        run_paths = merged
+
+    merge_group(run_paths, out, column)
+
+
+def merge_group(run_paths: list[str], out: str, column: str) -> None:
+    """Merge sorted CSV runs into one sorted CSV file"""
+    files = [open(path, "r", newline="", encoding="utf-8") for path in run_paths]
+    try:
+        readers = [csv.reader(file) for file in files]
+        header = None
+        for reader in readers:
+            header = next(reader)
+        key_index = header.index(column)
+
+        with open(out, "w", newline="", encoding="utf-8") as out_file:
+            writer = csv.writer(out_file, lineterminator=os.linesep)
+            writer.writerow(header)
+            writer.writerows(heapq.merge(*readers,
+                                         key=lambda row: float(row[key_index])))
+    finally:
+        for file in files:
+            file.close()
+
+    for path in run_paths:
+        if path != out:
+            os.remove(path)
+
+
+def process_in_chunks(csv_path: str, out: str, chunksize: int,
+                      workers: int = 1, batch_size: int = 16,
+                      target_size: int = 0,
+                      cache: FeatureCache | None = None) -> ColorHistogram:
+    """Read annotation by chunks, add features and write out file sorted
+    by brightness. Only one chunk is kept in memory at a time.
+    Returns histogram accumulated over all chunks; out is written only
+    if histogram.total > 0.
+    """
+    histogram = ColorHistogram()
+    total = 0
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    # Один пул процессов на весь поток, а не новый на каждый чанк
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()
+    out_dir = os.path.dirname(os.path.abspath(out))
+    with pool as executor, tempfile.TemporaryDirectory(dir=out_dir) as run_dir:
+        run_paths = []
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            if chunk.empty:
+                continue
+            rgb = funcs.add_features(chunk, workers, batch_size, target_size,
+                                     cache, executor)
+
+            # Гистограммы чанков сливаем по мере обработки
+            histogram.merge(funcs.build_histogram(chunk, rgb))
+            total += len(chunk)
+
+            run_paths.append(write_sorted_run(chunk, run_dir, "brightness_value"))
+            print(f"Processed {total} rows")
+
+        if run_paths:
+            merge_runs(run_paths, out, "brightness_value")
+
+    return histogram
\ No newline at end of file
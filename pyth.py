@@ -1,44 +1,359 @@
 import argparse
-from typing import List, Dict, Tuple
+from typing import Iterable, Iterator, List, Tuple, Union
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import json
+import mmap
+import os
 import re
 
-def read_file(filename: str) -> List[str]:
+from sketch import FrequentItems
+
+BLOCK_SIZE = 1024 * 1024  # Сколько символов читать из файла за раз, от него зависит пиковая память
+
+# Регулярное выражение для извлечения имени после "Имя:"
+# Работает сразу по блоку из многих строк (MULTILINE), пробелы по краям строки
+# пропускаются без strip(); группа ([^:\n]+) захватывает все символы кроме двоеточия и переноса строки
+NAME_PATTERN = re.compile(r'^[^\S\n]*Имя:[^\S\n]*([^:\n]+)$', re.MULTILINE)
+
+# Заголовок записи "N)" на отдельной строке - по нему файл делится на части
+RECORD_HEADER = re.compile(rb'\n\d+\)\r?\n')
+MIN_SHARD_SIZE = 32 * 1024 * 1024  # Части меньше этого не выгодно отдавать в отдельный процесс
+
+STATE_VERSION = 2  # Увеличивается при изменении формата файла состояния
+CHECKSUM_SAMPLES = 64  # Из скольких участков начала файла считается контрольная сумма
+CHECKSUM_SAMPLE_SIZE = 4096  # Размер одного участка, байт
+
+
+def read_blocks(filename: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
     """
-    Читает файл и возвращает список строк.
+    Читает файл большими блоками, каждый блок заканчивается на границе строки.
+    В памяти одновременно находится не больше одного блока.
     """
     try:
         with open(filename, "r", encoding="utf-8") as file:
-            return file.readlines()
+            tail = ""
+            while True:
+                block = file.read(block_size)
+                if not block:
+                    break
+                # Незаконченную последнюю строку переносим в следующий блок
+                end = block.rfind("\n") + 1
+                if end:
+                    yield tail + block[:end]
+                    tail = block[end:]
+                else:
+                    tail += block
+            if tail:
+                yield tail
     except FileNotFoundError as exc:
         raise FileNotFoundError(f"Файл {filename} не найден") from exc
 
 
-def extract_names_from_file(filename: str) -> List[str]:
+def iter_names(blocks: Iterable[str]) -> Iterator[str]:
     """
-    Извлекает имена из файла после метки 'Имя:' с использованием регулярного выражения.
+    Выдает имена после метки 'Имя:' из блоков текста.
     """
-    lines = read_file(filename)
-    names = []
-
-    # Регулярное выражение для извлечения имени после "Имя:"
-    # Группа ([^:\n]+) захватывает все символы кроме двоеточия и переноса строки
-    name_pattern = r'^Имя:\s*([^:\n]+)$'
-
-    for line in lines:
-        line = line.strip()
-        match = re.match(name_pattern, line)
-        if match:
+    for block in blocks:
+        for match in NAME_PATTERN.finditer(block):
             name = match.group(1).strip()
             if name:
-                names.append(name)
+                yield name
+
+
+def tally(blocks: Iterable[str], capacity: int = 0) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в блоках: точно (Counter) или, если capacity > 0,
+    приближенно в сводке из capacity счетчиков.
+    """
+    if not capacity:
+        name_counter = Counter()
+        name_counter.update(iter_names(blocks))
+        return name_counter
+
+    # Внутри блока считаем точно, а в сводку добавляем итог блока
+    sketch = FrequentItems(capacity)
+    for block in blocks:
+        sketch.update(Counter(iter_names([block])))
+    return sketch
+
+
+def merge_counts(total: Union[Counter, FrequentItems, None],
+                 part: Union[Counter, FrequentItems]) -> Union[Counter, FrequentItems]:
+    """
+    Складывает результаты подсчета частей (точные или приближенные).
+    """
+    if total is None:
+        return part
+    if isinstance(part, FrequentItems):
+        if isinstance(total, FrequentItems):
+            return total.merge(part)
+        if part.capacity is None:
+            total.update(part.counters)  # Точная сводка складывается с точным подсчетом
+            return total
+        return FrequentItems.from_counter(total).merge(part)
+    if isinstance(total, FrequentItems):
+        return total.merge(FrequentItems.from_counter(part))
+    total.update(part)
+    return total
+
+
+def count_names(filename: str, block_size: int = BLOCK_SIZE,
+                capacity: int = 0) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в файле потоково: память зависит от числа различных имен
+    (или от capacity в приближенном режиме), а не от размера файла.
+    """
+    return tally(read_blocks(filename, block_size), capacity)
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """
+    Раскрывает шаблоны вида 'dumps/*.txt' в список файлов (без повторов, по порядку).
+    Имена без совпадений остаются как есть, чтобы ошибка указала на них.
+    """
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else []
+        for filename in matches or [pattern]:
+            if filename not in filenames:
+                filenames.append(filename)
+    return filenames
 
-    return names
 
+def shard_ranges(filename: str, shards: int, start: int = 0, end: int = None) -> List[Tuple[int, int]]:
+    """
+    Делит байты [start, end) файла (по умолчанию весь файл) на shards диапазонов,
+    каждый следующий начинается с заголовка записи "N)".
+    """
+    if end is None:
+        end = os.path.getsize(filename)
+    size = end - start
+    shards = max(1, min(shards, size // MIN_SHARD_SIZE))
+    if shards == 1 or size <= 0:
+        return [(start, end)]
 
-def find_most_common_name(names: List[str]) -> Tuple[str, int]:
+    bounds = [start]
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for k in range(1, shards):
+            match = RECORD_HEADER.search(data, max(start + k * size // shards, bounds[-1]) - 1, end)
+            if match is None:
+                break
+            if match.start() + 1 > bounds[-1]:
+                bounds.append(match.start() + 1)
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+
+def read_blocks_mmap(filename: str, start: int, end: int, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """
+    Читает байты [start, end) файла через mmap блоками, разрезанными по концам строк.
+    """
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        position = start
+        while position < end:
+            stop = min(position + block_size, end)
+            if stop < end:
+                newline = data.rfind(b"\n", position, stop)
+                if newline >= 0:
+                    stop = newline + 1
+                else:
+                    stop = data.find(b"\n", stop, end) + 1 or end  # Очень длинная строка
+            # \r из концов строк Windows снимет strip() в iter_names
+            yield data[position:stop].decode("utf-8")
+            position = stop
+
+
+def count_shard(task: Tuple[str, int, int, int, int]) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в одной части файла (выполняется в процессе пула).
+    """
+    filename, start, end, block_size, capacity = task
+    return tally(read_blocks_mmap(filename, start, end, block_size), capacity)
+
+
+def count_shards(tasks: List[Tuple[str, int, int, int, int]], workers: int,
+                 capacity: int = 0) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в частях файлов на workers ядрах и складывает результаты.
+    """
+    name_counter = FrequentItems(capacity) if capacity else Counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_counter in executor.map(count_shard, tasks):
+            name_counter = merge_counts(name_counter, shard_counter)
+    return name_counter
+
+
+def count_range(filename: str, start: int, end: int, block_size: int = BLOCK_SIZE,
+                capacity: int = 0, workers: int = 1) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в байтах [start, end) файла, при workers > 1 - по частям в пуле процессов.
+    """
+    if workers > 1:
+        ranges = shard_ranges(filename, workers * 4, start, end)
+        if len(ranges) > 1:
+            return count_shards([(filename, shard_start, shard_end, block_size, capacity)
+                                 for shard_start, shard_end in ranges], workers, capacity)
+    return count_shard((filename, start, end, block_size, capacity))
+
+
+def count_names_parallel(filenames: List[str], workers: int, block_size: int = BLOCK_SIZE,
+                         capacity: int = 0) -> Union[Counter, FrequentItems]:
+    """
+    Подсчитывает имена в нескольких файлах на workers ядрах.
+    Каждый файл делится на части по границам записей, результаты частей складываются.
+    """
+    tasks = []
+    for filename in filenames:
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"Файл {filename} не найден")
+        if os.path.getsize(filename):
+            # Частей больше, чем процессов, чтобы процессы заканчивали примерно одновременно
+            for start, end in shard_ranges(filename, workers * 4):
+                tasks.append((filename, start, end, block_size, capacity))
+    return count_shards(tasks, workers, capacity)
+
+
+def state_path(filename: str) -> str:
+    """
+    Файл состояния инкрементального подсчета рядом с исходным файлом.
+    """
+    return f"{filename}.names-state.json"
+
+
+def prefix_checksum(data: mmap.mmap, end: int) -> str:
+    """
+    Контрольная сумма первых end байт по равномерно взятым участкам и самому концу.
+    Читается не больше CHECKSUM_SAMPLES участков, поэтому сумма считается мгновенно
+    даже для огромного файла; изменение длины или конца префикса она замечает всегда,
+    а правку в середине - только если та попала в один из участков.
+    """
+    digest = hashlib.sha256(str(end).encode())
+    step = max(end // CHECKSUM_SAMPLES, CHECKSUM_SAMPLE_SIZE)
+    for start in range(0, end, step):
+        digest.update(data[start:min(start + CHECKSUM_SAMPLE_SIZE, end)])
+    digest.update(data[max(0, end - CHECKSUM_SAMPLE_SIZE):end])
+    return digest.hexdigest()
+
+
+def hash_range(digest, data: mmap.mmap, start: int, end: int) -> None:
+    """
+    Добавляет в digest байты [start, end) блоками по BLOCK_SIZE.
+    """
+    for position in range(start, end, BLOCK_SIZE):
+        digest.update(data[position:min(position + BLOCK_SIZE, end)])
+
+
+def prefix_unchanged(data: mmap.mmap, state: dict, stat: os.stat_result, digest=None) -> bool:
+    """
+    Проверяет, что первые state["offset"] байт файла не изменились с прошлого запуска.
+    Правку без дописывания выдают размер и время изменения файла, правку вместе
+    с дописыванием - выборочная контрольная сумма (вероятностно). Если передан digest,
+    префикс хешируется в него целиком и сравнивается с полной суммой - точная проверка.
+    """
+    if stat.st_size < state["size"] or state["offset"] > len(data):
+        return False
+    if stat.st_size == state["size"] and stat.st_mtime_ns != state["mtime_ns"]:
+        return False
+    if digest is None:
+        return prefix_checksum(data, state["offset"]) == state["checksum"]
+    hash_range(digest, data, 0, state["offset"])
+    return digest.hexdigest() == state["full_checksum"]
+
+
+def load_state(path: str, capacity: int):
+    """
+    Сохраненное состояние или None, если его нет или оно от другого режима подсчета.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION or state.get("capacity") != capacity:
+        return None
+    return state
+
+
+def save_state(path: str, offset: int, checksum: str, capacity: int,
+               name_counter: Union[Counter, FrequentItems], stat: os.stat_result,
+               full_checksum: str = None) -> None:
+    """
+    Сохраняет смещение, контрольные суммы, размер и время изменения файла
+    и результат подсчета (через временный файл).
+    """
+    counts = name_counter.to_dict() if isinstance(name_counter, FrequentItems) else dict(name_counter)
+    state = {"version": STATE_VERSION, "offset": offset, "checksum": checksum,
+             "full_checksum": full_checksum, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+             "capacity": capacity, "counts": counts}
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def count_incremental(filename: str, block_size: int = BLOCK_SIZE, capacity: int = 0,
+                      workers: int = 1, verify_full: bool = False) -> Tuple[Union[Counter, FrequentItems], int]:
+    """
+    Подсчитывает имена в дописываемом файле, разбирая только то, что добавилось
+    с прошлого запуска. Если начало файла изменилось - полный пересчет.
+    По умолчанию правка в середине файла с одновременным дописыванием замечается
+    не всегда (выборочная контрольная сумма); verify_full хеширует начало файла целиком.
+    Возвращает (результат, сколько байт взято из сохраненного состояния).
+    """
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"Файл {filename} не найден")
+    path = state_path(filename)
+    state = load_state(path, capacity)
+    if not os.path.getsize(filename):
+        return tally([], capacity), 0
+    if state and verify_full and not state.get("full_checksum"):
+        print(f"Для {filename} сохранена только выборочная контрольная сумма, полный пересчет")
+        state = None
+
+    with open(filename, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        stat = os.fstat(file.fileno())
+        # Недописанную последнюю строку оставляем на следующий запуск
+        end = data.rfind(b"\n") + 1
+        start = 0
+        name_counter = None
+        digest = hashlib.sha256() if verify_full else None
+        if state and state["offset"] <= end and prefix_unchanged(data, state, stat, digest):
+            start = state["offset"]
+            counts = state["counts"]
+            name_counter = FrequentItems.from_dict(counts) if capacity else Counter(counts)
+        elif state:
+            print(f"Файл {filename} изменился не только в конце, полный пересчет")
+
+        checksum = prefix_checksum(data, end)
+        full_checksum = None
+        if verify_full:
+            if not start:
+                digest = hashlib.sha256()  # Проверка не прошла, хешируем заново с начала
+            hash_range(digest, data, start, end)
+            full_checksum = digest.hexdigest()
+
+    if end > start:
+        name_counter = merge_counts(name_counter, count_range(filename, start, end, block_size, capacity, workers))
+    elif name_counter is None:
+        name_counter = tally([], capacity)
+    save_state(path, end, checksum, capacity, name_counter, stat, full_checksum)
+    return name_counter, start
+
+
+def extract_names_from_file(filename: str) -> List[str]:
+    """
+    Извлекает имена из файла после метки 'Имя:' с использованием регулярного выражения.
+    """
+    return list(iter_names(read_blocks(filename)))
+
+
+def find_most_common_name(names: Union[List[str], Counter, FrequentItems]) -> Tuple[str, int]:
     """
     Находит самое частое имя и количество его вхождений.
+    Принимает список имен, уже готовый Counter или приближенную сводку.
 
     Returns:
         Tuple[str, int]: (самое_частое_имя, количество)
@@ -46,34 +361,116 @@ def find_most_common_name(names: List[str]) -> Tuple[str, int]:
     if not names:
         return ("", 0)
 
-    name_counter = Counter(names)
-    return name_counter.most_common(1)[0]
+    name_counter = names if isinstance(names, (Counter, FrequentItems)) else Counter(names)
+    top = name_counter.most_common(1)
+    return top[0] if top else ("", 0)
+
+
+def print_top(name_counter: Union[Counter, FrequentItems], k: int) -> None:
+    """
+    Выводит k самых частых имен, для сводки - с границами погрешности.
+    """
+    top = name_counter.most_common(k)
+    if k == 1 and isinstance(name_counter, Counter):
+        print(f"Самое частое имя: '{top[0][0]}' (встречается {top[0][1]} раз)")
+        return
+
+    if not top:
+        # Все счетчики сводки обнулились: ни одно имя не встречается чаще погрешности
+        print(f"Нет имен, встречающихся чаще границы погрешности {name_counter.error} раз")
+    else:
+        print(f"Самые частые имена (топ-{k}):")
+    for place, (name, count) in enumerate(top, 1):
+        if isinstance(name_counter, FrequentItems) and name_counter.error:
+            print(f"  {place}. '{name}' - от {count} до {count + name_counter.error} раз")
+        else:
+            print(f"  {place}. '{name}' - {count} раз")
+
+    if isinstance(name_counter, FrequentItems):
+        print(f"Приближенный подсчет: {name_counter.total} имен, {len(name_counter)} счетчиков, "
+              f"погрешность не больше {name_counter.error} "
+              f"(найдены все имена, встречающиеся чаще {name_counter.error} раз)")
 
 
 def main() -> None:
     """
     Основная функция программы.
     """
-    parser = argparse.ArgumentParser(description='Находит самое частое имя в файле')
-    parser.add_argument('filename', type=str, help='Имя входного файла с данными')
+    parser = argparse.ArgumentParser(description='Находит самое частое имя в файлах')
+    parser.add_argument('filenames', type=str, nargs='+',
+                        help='Входные файлы с данными или шаблоны вида "dumps/*.txt"')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Количество процессов (0 - по числу ядер)')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE // (1024 * 1024),
+                        help='Размер блока чтения в мегабайтах (не меньше 1)')
+    parser.add_argument('--top', type=int, default=1,
+                        help='Сколько самых частых имен вывести (не меньше 1)')
+    parser.add_argument('--approx', type=int, default=0,
+                        help='Приближенный подсчет в сводке из N счетчиков (0 - точный)')
+    parser.add_argument('--merge-sketch', type=str, nargs='*', default=[],
+                        help='Добавить сводки, сохраненные прошлыми запусками (--save-sketch)')
+    parser.add_argument('--save-sketch', type=str, default=None,
+                        help='Сохранить итоговую сводку в JSON для последующего объединения')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Разбирать только дописанное с прошлого запуска (состояние хранится '
+                             'в <файл>.names-state.json). Правка начала файла замечается по размеру, '
+                             'времени изменения и выборочной контрольной сумме - вероятностно, '
+                             'если файл одновременно дописан (см. --verify-full)')
+    parser.add_argument('--verify-full', action='store_true',
+                        help='С --incremental проверять начало файла полной контрольной суммой '
+                             '(читает файл целиком, но не разбирает его)')
+
+    args = parser.parse_args()
+    if args.top < 1:
+        parser.error('--top должно быть не меньше 1')
+    if args.block_size < 1:
+        parser.error('--block-size должно быть не меньше 1')
 
     try:
-        args = parser.parse_args()
+        filenames = expand_inputs(args.filenames)
+        block_size = args.block_size * 1024 * 1024
+        workers = args.workers or os.cpu_count()
+        sketches = [FrequentItems.load(path) for path in args.merge_sketch]
+        # Сохраненные сводки складываются только со сводками (точные размер не ограничивают)
+        capacity = args.approx or min((sketch.capacity for sketch in sketches if sketch.capacity),
+                                      default=0)
 
-        names = extract_names_from_file(args.filename)
+        if args.incremental:
+            name_counter = None
+            for filename in filenames:
+                file_counter, reused = count_incremental(filename, block_size, capacity,
+                                                         workers, args.verify_full)
+                if reused:
+                    print(f"{filename}: из состояния взято {reused / 2 ** 20:.1f} МБ, "
+                          f"разобрано {(os.path.getsize(filename) - reused) / 2 ** 20:.1f} МБ")
+                name_counter = merge_counts(name_counter, file_counter)
+        elif workers > 1:
+            name_counter = count_names_parallel(filenames, workers, block_size, capacity)
+        else:
+            name_counter = None
+            for filename in filenames:
+                name_counter = merge_counts(name_counter, count_names(filename, block_size, capacity))
+        for sketch in sketches:
+            name_counter = merge_counts(name_counter, sketch)
 
-        if not names:
+        if args.save_sketch:
+            if isinstance(name_counter, FrequentItems):
+                name_counter.save(args.save_sketch)
+            else:
+                # Точный подсчет сохраняется точной сводкой: при объединении она не уменьшит размер
+                FrequentItems.from_counter(name_counter).save(args.save_sketch)
+
+        # У сводки счетчики могут обнулиться и при непустом файле, поэтому смотрим на total
+        found = name_counter.total if isinstance(name_counter, FrequentItems) else len(name_counter)
+        if not found:
             print("Имена не найдены")
             return
 
-        most_common_name, count = find_most_common_name(names)
-
-        print(f"Самое частое имя: '{most_common_name}' (встречается {count} раз)")
+        print_top(name_counter, args.top)
 
     except Exception as exc:
         print(f"Ошибка: {exc}")
 
 
 if __name__ == "__main__":
-    main()
-
+    main()
\ No newline at end of file
@@ -0,0 +1,368 @@
+import argparse
+import datetime
+import importlib.util
+import os
+import re
+import time
+from array import array
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pyth import read_blocks
+
+# Поля записи реестра и имена столбцов для них
+FIELDS = {
+    'Фамилия': 'surname',
+    'Имя': 'name',
+    'Пол': 'gender',
+    'Дата рождения': 'birth_date',
+    'Номер телефона или email': 'contact',
+    'Город': 'city',
+}
+# Столбцы с небольшим числом различных значений хранятся словарем: коды + значения
+CATEGORICAL = ('surname', 'name', 'gender', 'city')
+# Разные написания пола приводятся к одному
+GENDERS = {'мужской': 'М', 'м': 'М', 'женский': 'Ж', 'ж': 'Ж'}
+
+RECORD_HEADER = re.compile(r'^\s*\d+\)\s*$')  # Строка "N)" начинает новую запись
+# dd.mm.yyyy, d.mm.yyyy, dd-mm-yyyy, dd/mm/yyyy, "dd mm yyyy"
+DATE_PATTERN = re.compile(r'^(\d{1,2})[./\- ](\d{1,2})[./\- ](\d{4})$')
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+NAT = np.iinfo(np.int64).min  # Так в datetime64 записывается "нет даты"
+CACHE_VERSION = 1  # Увеличивается при изменении формата кэша
+
+
+def parse_date(text: str) -> int:
+    """
+    Дата рождения в днях от 1970-01-01 или NAT, если ее не удалось разобрать.
+    """
+    match = DATE_PATTERN.match(text)
+    if not match:
+        return NAT
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        return datetime.date(year, month, day).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return NAT
+
+
+class DictionaryEncoder:
+    """
+    Кодирование значений столбца номерами в словаре (в порядке первого появления).
+    """
+
+    def __init__(self):
+        self.codes = array('i')
+        self.index = {}
+        self.values = []
+
+    def add(self, value: str) -> None:
+        """
+        Добавить значение очередной записи.
+        """
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.index[value] = code
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class RecordParser:
+    """
+    Разбор файла реестра за один проход в столбцы.
+    """
+
+    def __init__(self):
+        self.encoders = {field: DictionaryEncoder() for field in CATEGORICAL}
+        self.birth_dates = array('q')
+        self.contact_data = bytearray()
+        self.contact_offsets = array('q', [0])
+        self.record = {}
+
+    def feed(self, block: str) -> None:
+        """
+        Разобрать блок текста, заканчивающийся на границе строки.
+        """
+        for line in block.split('\n'):
+            if RECORD_HEADER.match(line):
+                self.flush()
+                continue
+            key, separator, value = line.partition(':')
+            field = FIELDS.get(key.strip()) if separator else None
+            if field is not None and field not in self.record:
+                self.record[field] = value.strip()
+        # Запись может продолжиться в следующем блоке, поэтому здесь ее не сбрасываем
+
+    def flush(self) -> None:
+        """
+        Дописать накопленную запись в столбцы.
+        """
+        record = self.record
+        if not record:
+            return
+
+        name = record.get('name', '')
+        if ':' in name:
+            name = ''  # Так же, как в pyth.py: имя с двоеточием не считается именем
+        self.encoders['name'].add(name)
+        self.encoders['surname'].add(record.get('surname', ''))
+        self.encoders['city'].add(record.get('city', ''))
+        gender = record.get('gender', '')
+        self.encoders['gender'].add(GENDERS.get(gender.lower(), gender))
+        self.birth_dates.append(parse_date(record.get('birth_date', '')))
+        self.contact_data += record.get('contact', '').encode('utf-8')
+        self.contact_offsets.append(len(self.contact_data))
+        self.record = {}
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Столбцы в виде массивов NumPy.
+        """
+        self.flush()
+        columns = {}
+        for field, encoder in self.encoders.items():
+            columns[f'{field}_codes'] = np.frombuffer(encoder.codes, dtype=np.int32).copy()
+            columns[f'{field}_values'] = np.array(encoder.values, dtype=str)
+        columns['birth_date'] = np.frombuffer(self.birth_dates, dtype=np.int64).view('datetime64[D]').copy()
+        columns['contact_data'] = np.frombuffer(bytes(self.contact_data), dtype=np.uint8)
+        columns['contact_offsets'] = np.frombuffer(self.contact_offsets, dtype=np.int64).copy()
+        return columns
+
+
+class Registry:
+    """
+    Реестр в столбцах: запросы выполняются над массивами, без повторного чтения текста.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['birth_date'])
+
+    def values(self, field: str) -> np.ndarray:
+        """
+        Значения категориального столбца field (по строке на запись).
+        """
+        return self.columns[f'{field}_values'][self.columns[f'{field}_codes']]
+
+    def contact(self, index: int) -> str:
+        """
+        Телефон или email записи index.
+        """
+        offsets = self.columns['contact_offsets']
+        return self.columns['contact_data'][offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def top_values(self, field: str, k: int = 1, mask: np.ndarray = None) -> List[Tuple[str, int]]:
+        """
+        k самых частых непустых значений столбца field (среди записей mask, если задана).
+        При равенстве раньше идет значение, встретившееся в файле первым, как у Counter.
+        """
+        codes = self.columns[f'{field}_codes']
+        values = self.columns[f'{field}_values']
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes, minlength=len(values))
+        counts[values == ''] = 0
+        order = np.argsort(-counts, kind='stable')[:k]
+        return [(str(values[code]), int(counts[code])) for code in order if counts[code]]
+
+    def most_common_name(self) -> Tuple[str, int]:
+        """
+        Самое частое имя и количество его вхождений.
+        """
+        top = self.top_values('name', 1)
+        return top[0] if top else ("", 0)
+
+    def top_names_by_gender(self, k: int) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        k самых частых имен для каждого пола.
+        """
+        codes = self.columns['gender_codes']
+        result = {}
+        for code, gender in enumerate(self.columns['gender_values']):
+            result[str(gender) or '?'] = self.top_values('name', k, codes == code)
+        return result
+
+    def birth_year_histogram(self) -> List[Tuple[int, int]]:
+        """
+        Количество записей по годам рождения (записи без даты не учитываются).
+        """
+        dates = self.columns['birth_date']
+        years = dates[~np.isnat(dates)].astype('datetime64[Y]').astype(np.int64) + 1970
+        found, counts = np.unique(years, return_counts=True)
+        return list(zip(found.tolist(), counts.tolist()))
+
+
+def has_pyarrow() -> bool:
+    """
+    Установлен ли pyarrow (без его импорта).
+    """
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def cache_path(source: str, fmt: str) -> str:
+    """
+    Путь к кэшу рядом с исходным файлом.
+    """
+    return f'{source}.{fmt}'
+
+
+def source_stamp(source: str) -> Tuple[int, int]:
+    """
+    Размер и время изменения исходного файла: по ним проверяется свежесть кэша.
+    """
+    stat = os.stat(source)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def parse_registry(source: str) -> Registry:
+    """
+    Разобрать текстовый реестр за один проход.
+    """
+    parser = RecordParser()
+    for block in read_blocks(source):
+        parser.feed(block)
+    return Registry(parser.columns())
+
+
+def save_npz(registry: Registry, path: str, stamp: Tuple[int, int]) -> None:
+    """
+    Записать столбцы в .npz вместе с отметкой исходного файла.
+    """
+    with open(path, 'wb') as file:
+        np.savez(file, **registry.columns, stamp=np.array([*stamp, CACHE_VERSION], dtype=np.int64))
+
+
+def load_npz(path: str, stamp: Tuple[int, int]):
+    """
+    Прочитать .npz, если он сделан из файла с такой отметкой, иначе None.
+    """
+    with np.load(path) as data:
+        if data['stamp'].tolist() != [*stamp, CACHE_VERSION]:
+            return None
+        return Registry({key: data[key] for key in data.files if key != 'stamp'})
+
+
+def save_parquet(registry: Registry, path: str, stamp: Tuple[int, int]) -> None:
+    """
+    Записать столбцы в Parquet: категориальные - словарными столбцами Arrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = registry.columns
+    arrays = {}
+    for field in CATEGORICAL:
+        arrays[field] = pa.DictionaryArray.from_arrays(
+            pa.array(columns[f'{field}_codes']), pa.array(columns[f'{field}_values'].tolist()))
+    arrays['birth_date'] = pa.array(columns['birth_date'], type=pa.date32())
+    offsets = columns['contact_offsets']
+    arrays['contact'] = pa.LargeStringArray.from_buffers(
+        len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(columns['contact_data']))
+
+    table = pa.table(arrays).replace_schema_metadata(
+        {'stamp': ','.join(map(str, [*stamp, CACHE_VERSION]))})
+    pq.write_table(table, path)
+
+
+def load_parquet(path: str, stamp: Tuple[int, int]):
+    """
+    Прочитать Parquet, если он сделан из файла с такой отметкой, иначе None.
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'stamp', b'').decode() != ','.join(map(str, [*stamp, CACHE_VERSION])):
+        return None
+
+    columns = {}
+    for field in CATEGORICAL:
+        column = table.column(field).combine_chunks()
+        columns[f'{field}_codes'] = column.indices.to_numpy().astype(np.int32)
+        columns[f'{field}_values'] = np.array(column.dictionary.to_pylist(), dtype=str)
+    columns['birth_date'] = table.column('birth_date').to_numpy().astype('datetime64[D]')
+    contact = table.column('contact').combine_chunks()
+    _, offsets, data = contact.buffers()
+    columns['contact_offsets'] = np.frombuffer(offsets, dtype=np.int64)[contact.offset:contact.offset + len(contact) + 1]
+    columns['contact_data'] = np.frombuffer(data, dtype=np.uint8) if data else np.zeros(0, dtype=np.uint8)
+    return Registry(columns)
+
+
+CACHE_FORMATS = {
+    'npz': (save_npz, load_npz),
+    'parquet': (save_parquet, load_parquet),
+}
+
+
+def load_registry(source: str, fmt: str = None, rebuild: bool = False) -> Tuple[Registry, bool]:
+    """
+    Реестр из кэша рядом с source, если он свежий, иначе разбор файла и запись кэша.
+    fmt - 'parquet' или 'npz' (по умолчанию parquet, если установлен pyarrow).
+    Возвращает (реестр, взят ли он из кэша).
+    """
+    if fmt is None:
+        fmt = 'parquet' if has_pyarrow() else 'npz'
+    save, load = CACHE_FORMATS[fmt]
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Файл {source} не найден")
+
+    stamp = source_stamp(source)
+    path = cache_path(source, fmt)
+    if not rebuild and os.path.exists(path):
+        try:
+            registry = load(path, stamp)
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"Кэш {path} поврежден, будет пересоздан: {exc}")
+            registry = None
+        if registry is not None:
+            return registry, True
+
+    registry = parse_registry(source)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    save(registry, temp_path, stamp)
+    os.replace(temp_path, path)
+    return registry, False
+
+
+def main() -> None:
+    """
+    Основная функция программы.
+    """
+    parser = argparse.ArgumentParser(description='Запросы к реестру в столбцовом кэше')
+    parser.add_argument('filename', type=str, help='Входной файл с данными')
+    parser.add_argument('--format', choices=sorted(CACHE_FORMATS), default=None,
+                        help='Формат кэша (по умолчанию parquet, если есть pyarrow)')
+    parser.add_argument('--rebuild', action='store_true', help='Пересоздать кэш')
+    parser.add_argument('--top', type=int, default=3, help='Сколько имен показывать для каждого пола')
+
+    try:
+        args = parser.parse_args()
+
+        start = time.perf_counter()
+        registry, cached = load_registry(args.filename, args.format, args.rebuild)
+        elapsed = time.perf_counter() - start
+        source = "из кэша" if cached else "разбором файла"
+        print(f"Загружено {len(registry)} записей {source} за {elapsed * 1000:.0f} мс")
+
+        start = time.perf_counter()
+        most_common_name, count = registry.most_common_name()
+        by_gender = registry.top_names_by_gender(args.top)
+        years = registry.birth_year_histogram()
+        elapsed = time.perf_counter() - start
+
+        print(f"Самое частое имя: '{most_common_name}' (встречается {count} раз)")
+        for gender, top in by_gender.items():
+            print(f"Пол {gender}: " + ", ".join(f"{name} ({number})" for name, number in top))
+        print("Годы рождения: " + ", ".join(f"{year}: {number}" for year, number in years))
+        print(f"Запросы выполнены за {elapsed * 1000:.1f} мс")
+
+    except Exception as exc:
+        print(f"Ошибка: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import heapq
+import json
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+class FrequentItems:
+    """
+    Приближенный подсчет частых значений (сводка Мисры-Гриса) с ограниченной памятью.
+
+    Хранится не больше capacity счетчиков. Оценка частоты занижена не более
+    чем на error: истинное значение лежит в [оценка, оценка + error], и каждое
+    значение, встретившееся больше error раз, гарантированно есть в сводке.
+    error не превышает total / (capacity + 1). Сводки складываются (merge)
+    с той же гарантией, поэтому части файла и ежедневные дописки можно
+    считать отдельно и объединять, не перечитывая старые данные.
+
+    capacity=None - точная сводка без ограничения на число счетчиков (error всегда 0).
+    """
+
+    def __init__(self, capacity: Optional[int]):
+        if capacity is not None and capacity < 1:
+            raise ValueError("Размер сводки должен быть положительным")
+        self.capacity = capacity
+        self.counters = {}  # значение -> заниженная оценка частоты
+        self.total = 0  # Сколько всего значений учтено
+        self.error = 0  # Максимальное занижение любой оценки
+
+    def __len__(self) -> int:
+        return len(self.counters)
+
+    def update(self, counts: Dict[str, int]) -> None:
+        """
+        Учесть точные частоты (например, Counter одного блока файла).
+        """
+        counters = self.counters
+        for item, count in counts.items():
+            counters[item] = counters.get(item, 0) + count
+            self.total += count
+        # Сокращаем не после каждого значения, а когда счетчиков стало вдвое больше
+        if self.capacity is not None and len(counters) > 2 * self.capacity:
+            self.prune()
+
+    def add(self, item: str, count: int = 1) -> None:
+        """
+        Учесть одно значение.
+        """
+        self.update({item: count})
+
+    def merge(self, other: "FrequentItems") -> "FrequentItems":
+        """
+        Добавить другую сводку (размер берется меньший из двух, точная сводка
+        размер не ограничивает).
+        """
+        total = self.total + other.total
+        if self.capacity is None:
+            self.capacity = other.capacity
+        elif other.capacity is not None:
+            self.capacity = min(self.capacity, other.capacity)
+        self.error += other.error
+        self.update(other.counters)
+        self.total = total  # update учел только то, что осталось в счетчиках other
+        self.prune()
+        return self
+
+    def __iadd__(self, other: "FrequentItems") -> "FrequentItems":
+        return self.merge(other)
+
+    def prune(self) -> None:
+        """
+        Оставить не больше capacity счетчиков: из всех вычитается (capacity + 1)-й по величине.
+        """
+        if self.capacity is None or len(self.counters) <= self.capacity:
+            return
+        threshold = heapq.nlargest(self.capacity + 1, self.counters.values())[-1]
+        self.counters = {item: count - threshold
+                         for item, count in self.counters.items() if count > threshold}
+        self.error += threshold
+
+    def most_common(self, k: int = None) -> List[Tuple[str, int]]:
+        """
+        k значений с наибольшей оценкой частоты.
+        """
+        if k is None:
+            return sorted(self.counters.items(), key=lambda pair: -pair[1])
+        return heapq.nlargest(k, self.counters.items(), key=lambda pair: pair[1])
+
+    def to_dict(self) -> dict:
+        """
+        Сводка в виде, пригодном для JSON.
+        """
+        return {'capacity': self.capacity, 'total': self.total,
+                'error': self.error, 'counters': self.counters}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FrequentItems":
+        """
+        Сводка из результата to_dict.
+        """
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch.error = data['error']
+        sketch.counters = dict(data['counters'])
+        return sketch
+
+    @classmethod
+    def from_counter(cls, counter: Counter, capacity: Optional[int] = None) -> "FrequentItems":
+        """
+        Сводка по точному подсчету (по умолчанию точная, без ограничения размера).
+        """
+        sketch = cls(capacity)
+        sketch.update(counter)
+        sketch.prune()
+        return sketch
+
+    def save(self, path: str) -> None:
+        """
+        Записать сводку в JSON.
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "FrequentItems":
+        """
+        Прочитать сводку из JSON.
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))